@@ -0,0 +1,101 @@
+# Библиотеки
+import asyncio
+import itertools
+import json
+import time
+from typing import Any
+
+from aiohttp import web
+
+# Локальная подмена Telegram Bot API для нагрузочных тестов.
+# Поддерживает getMe, getUpdates (long polling) и sendMessage; остальные методы отвечают ok.
+
+BOT_INFO = {"id": 100000, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+
+
+class FakeTelegramServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8081):
+        self.host = host
+        self.port = port
+        self.updates: list[dict] = []
+        self.sent: list[tuple[float, int, str]] = [] # (время получения, chat_id, текст)
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+        self._new_updates = asyncio.Condition()
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_route("POST", "/bot{token}/{method}", self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host=self.host, port=self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def push_message(self, user_id: int, text: str) -> int:
+        """Кладёт входящее сообщение пользователя в очередь getUpdates."""
+        update_id = next(self._update_ids)
+        self.updates.append({
+            "update_id": update_id,
+            "message": {
+                "message_id": next(self._message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "from": {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"},
+                "text": text,
+            },
+        })
+        async with self._new_updates:
+            self._new_updates.notify_all()
+        return update_id
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        params = dict(await request.post())
+
+        if method == "getme":
+            result: Any = BOT_INFO
+        elif method == "getupdates":
+            result = await self._get_updates(params)
+        elif method == "sendmessage":
+            result = self._send_message(params)
+        else:
+            result = True
+
+        return web.json_response({"ok": True, "result": result}, dumps=json.dumps)
+
+    async def _get_updates(self, params: dict) -> list[dict]:
+        offset = int(params.get("offset", 0) or 0)
+        timeout = float(params.get("timeout", 0) or 0)
+
+        # Подтверждённые обновления больше не нужны
+        self.updates = [update for update in self.updates if update["update_id"] >= offset]
+        if not self.updates and timeout:
+            async with self._new_updates:
+                try:
+                    await asyncio.wait_for(self._new_updates.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+        return self.updates[:100]
+
+    def _send_message(self, params: dict) -> dict:
+        chat_id = int(params["chat_id"])
+        text = params.get("text", "")
+        self.sent.append((time.time(), chat_id, text))
+        return {
+            "message_id": next(self._message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_INFO,
+            "text": text,
+        }
+
+
+__all__ = ['FakeTelegramServer']
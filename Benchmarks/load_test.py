@@ -0,0 +1,193 @@
+# Библиотеки
+import argparse
+import asyncio
+import logging
+import os
+import resource
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+
+from pymongo import monitoring
+
+# Нагрузочный тест бота: подменный Telegram API + локальная MongoDB или хранилище в памяти.
+# Запуск: python -m Benchmarks.load_test --users 200 --reminders 5 [--backend memory]
+# Используется отдельная БД (BENCH_MONGO_DB_NAME, по умолчанию myra_bench), она очищается перед запуском.
+os.environ["MONGO_DB_NAME"] = os.getenv("BENCH_MONGO_DB_NAME", "myra_bench")
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.enums import ParseMode
+
+from Benchmarks.fake_telegram import FakeTelegramServer
+
+logger = logging.getLogger(__name__)
+
+
+class MongoCommandCounter(monitoring.CommandListener):
+    """Считает команды, отправленные в MongoDB."""
+
+    def __init__(self):
+        self.counts: Counter = Counter()
+
+    def started(self, event):
+        self.counts[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def percentiles(values: list[float]) -> str:
+    if not values:
+        return "нет данных"
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return (
+        f"n={len(ordered)} p50={pick(0.50) * 1000:.1f}мс p95={pick(0.95) * 1000:.1f}мс "
+        f"p99={pick(0.99) * 1000:.1f}мс max={ordered[-1] * 1000:.1f}мс"
+    )
+
+
+async def monitor_loop_lag(samples: list[float], interval: float = 0.05) -> None:
+    """Измеряет, насколько позже запланированного просыпается event loop."""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(loop.time() - expected, 0))
+
+
+async def run(users: int, reminders_per_user: int, cancel_ratio: float, minutes: int, port: int) -> None:
+    command_counter = MongoCommandCounter()
+    monitoring.register(command_counter)
+
+    from Database.connection import connect_database, close_mongo_connection
+    import Database.connection as connection
+    from Commands.start import router as start_router
+    from Commands.help import router as help_router
+    from Commands.reminders import (
+        router as reminders_router, set_bot_instance, load_pending_reminders,
+        start_scheduler, stop_scheduler, flush_status_updates,
+    )
+
+    fake_api = FakeTelegramServer(port=port)
+    await fake_api.start()
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base(fake_api.base_url))
+    bot = Bot(token="100000:BENCH", session=session, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    dp = Dispatcher()
+
+    # Время обработки каждой команды
+    handler_latency: dict[str, list[float]] = defaultdict(list)
+
+    @dp.message.outer_middleware()
+    async def measure_latency(handler, event, data):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            command = (event.text or "").split(maxsplit=1)[0]
+            handler_latency[command].append(time.perf_counter() - started)
+
+    await connect_database(ensure=False)
+    await connection.reminders.clear()
+    await connection.ensure_indexes()
+
+    set_bot_instance(bot)
+    dp.include_router(start_router)
+    dp.include_router(help_router)
+    dp.include_router(reminders_router)
+    start_scheduler()
+    await load_pending_reminders()
+
+    loop_lag: list[float] = []
+    lag_task = asyncio.create_task(monitor_loop_lag(loop_lag))
+    polling_task = asyncio.create_task(dp.start_polling(bot, handle_signals=False))
+
+    commands_before = sum(command_counter.counts.values())
+    started_at = time.time()
+
+    # Пользователи ставят напоминания, часть из них потом всё отменяет
+    user_ids = range(1, users + 1)
+    for i in range(reminders_per_user):
+        for user_id in user_ids:
+            await fake_api.push_message(user_id, f"/set_reminder через {minutes} минут bench-{user_id}-{i}")
+    cancelling = set(list(user_ids)[: int(users * cancel_ratio)])
+    for user_id in cancelling:
+        await fake_api.push_message(user_id, "/cancel_reminders")
+
+    expected_replies = users * reminders_per_user + len(cancelling)
+    while sum(len(v) for v in handler_latency.values()) < expected_replies:
+        await asyncio.sleep(0.1)
+    logger.warning(f"Все {expected_replies} команд обработаны за {time.time() - started_at:.1f} с. Ждём срабатывания напоминаний...")
+
+    # Ждём, пока отправка напоминаний не затихнет после наступления их срока
+    deadline = started_at + minutes * 60
+    last_count = -1
+    while time.time() < deadline or len(fake_api.sent) != last_count:
+        last_count = len(fake_api.sent)
+        await asyncio.sleep(5)
+
+    await flush_status_updates()
+    mongo_commands = dict(command_counter.counts)
+    mongo_total = sum(mongo_commands.values()) - commands_before
+
+    # Лаг срабатывания: фактическое время отправки минус target_datetime
+    targets = {}
+    async for doc in connection.reminders.find_all():
+        targets[doc["reminder_text"]] = doc["target_datetime"]
+    firing_lag = []
+    delivered = 0
+    for sent_at, _, text in fake_api.sent:
+        reminder_text = text.removeprefix("⏰ Напоминание: ")
+        if not reminder_text.startswith("bench-"):
+            continue
+        delivered += 1
+        target = targets.get(reminder_text)
+        if target is not None:
+            firing_lag.append((datetime.fromtimestamp(sent_at) - target).total_seconds())
+
+    created = users * reminders_per_user
+    print("=== Результаты нагрузочного теста ===")
+    print(f"Пользователей: {users}, напоминаний: {created}, отменили: {len(cancelling)} пользователей")
+    print(f"Доставлено напоминаний: {delivered} (из них после отмены: {max(delivered - len(targets), 0)})")
+    for command, values in sorted(handler_latency.items()):
+        print(f"Обработка {command}: {percentiles(values)}")
+    print(f"Лаг срабатывания: {percentiles(firing_lag)}")
+    print(f"Лаг event loop: {percentiles(loop_lag)}")
+    if connection.db is not None:
+        print(f"Команд MongoDB: {mongo_total}, на напоминание: {mongo_total / max(created, 1):.2f} {mongo_commands}")
+    print(f"Пиковый RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} МБ")
+
+    await dp.stop_polling()
+    lag_task.cancel()
+    await asyncio.gather(polling_task, lag_task, return_exceptions=True)
+    await stop_scheduler()
+    await close_mongo_connection()
+    await bot.session.close()
+    await fake_api.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест бота-секретаря")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--reminders", type=int, default=3, help="напоминаний на пользователя")
+    parser.add_argument("--cancel-ratio", type=float, default=0.1, help="доля пользователей, вызывающих /cancel_reminders")
+    parser.add_argument("--minutes", type=int, default=1, help="через сколько минут срабатывают напоминания")
+    parser.add_argument("--port", type=int, default=8081, help="порт подменного Telegram API")
+    parser.add_argument("--backend", choices=("mongo", "memory"), default="mongo", help="хранилище напоминаний")
+    args = parser.parse_args()
+    # Модули бота импортируются внутри run(), после выбора хранилища
+    os.environ["DB_BACKEND"] = args.backend
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - [%(name)s] - %(levelname)s - %(message)s")
+    asyncio.run(run(args.users, args.reminders, args.cancel_ratio, args.minutes, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Библиотеки
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from Database.models import Reminder
+from Scheduler.entry import ScheduledReminder, SCHEDULED_FIELDS
+from Scheduler.scheduler import ReminderScheduler
+
+# Сравнение памяти на одно ожидающее напоминание и скорости загрузки:
+# прежняя схема (pydantic Reminder + отдельная задача asyncio.sleep с замыканием)
+# против компактного ScheduledReminder в общей куче планировщика.
+# Запуск: python -m Benchmarks.memory_footprint --count 100000
+
+
+def make_docs(count: int) -> list[dict]:
+    now = datetime.now()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": 100000 + i % 5000,
+            "chat_id": 100000 + i % 5000,
+            "reminder_text": f"Напоминание номер {i}",
+            "target_datetime": now + timedelta(hours=1, seconds=i),
+            "created_at": now,
+            "is_sent": False,
+            "sent_at": None,
+            "lease_owner": None,
+            "lease_expires_at": None,
+        }
+        for i in range(count)
+    ]
+
+
+async def _noop(reminder) -> None:
+    pass
+
+
+def load_legacy(docs: list[dict]) -> list:
+    """Прежняя загрузка: валидация каждого документа и задача на каждое напоминание."""
+    tasks = []
+    for doc in docs:
+        reminder = Reminder(**doc)
+        delay = (reminder.target_datetime - datetime.now()).total_seconds()
+        task = asyncio.ensure_future(asyncio.sleep(delay))
+        task.add_done_callback(lambda t, r=reminder: (r.chat_id, r.reminder_text, r.id))
+        tasks.append(task)
+    return tasks
+
+
+def load_compact(docs: list[dict]) -> ReminderScheduler:
+    """Текущая загрузка: документ из БД (только нужные поля) прямо в кучу планировщика."""
+    scheduler = ReminderScheduler(_noop)
+    for doc in docs:
+        scheduler.schedule(ScheduledReminder.from_doc(doc))
+    return scheduler
+
+
+def release(result) -> None:
+    # Задачи прежней схемы держит сам event loop, их нужно отменить явно
+    if isinstance(result, list):
+        for task in result:
+            task.cancel()
+
+
+def measure(name: str, loader, docs: list[dict]) -> None:
+    gc.collect()
+    started = time.perf_counter()
+    result = loader(docs)
+    elapsed = time.perf_counter() - started
+    release(result)
+    del result
+    gc.collect()
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    result = loader(docs)
+    allocated = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    release(result)
+    print(f"{name}: {allocated / len(docs):.0f} байт на напоминание, {len(docs) / elapsed:,.0f} документов/с")
+
+
+async def run(count: int) -> None:
+    full_docs = make_docs(count)
+    projected_docs = [{field: doc[field] for field in SCHEDULED_FIELDS} for doc in full_docs]
+    print(f"Ожидающих напоминаний: {count}")
+    measure("Было (Reminder + задача asyncio)", load_legacy, full_docs)
+    # Даём отменённым задачам завершиться
+    await asyncio.sleep(0)
+    measure("Стало (ScheduledReminder + куча)", load_compact, projected_docs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Память и скорость загрузки ожидающих напоминаний")
+    parser.add_argument("--count", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.count))
+
+
+if __name__ == "__main__":
+    main()
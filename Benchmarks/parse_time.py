@@ -0,0 +1,154 @@
+# Библиотеки
+import argparse
+import random
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+from time_parser import parse_reminder, _scan, _scan_phrase
+
+# Проверка и скорость разбора времени в /set_reminder.
+# Сначала прогоняется набор фраз с ожидаемым результатом (относительно фиксированного now),
+# затем на корпусе сообщений сравнивается прежний разбор (три регулярных выражения)
+# с однопроходным time_parser без кэша и с кэшем.
+# Запуск: python -m Benchmarks.parse_time --messages 200000
+
+NOW = datetime(2026, 10, 17, 12, 0) # Суббота
+
+# (сообщение, ожидаемое время или None, ожидаемый текст напоминания)
+CASES = [
+    ("через 5 минут Закрыть задачу", datetime(2026, 10, 17, 12, 5), "Закрыть задачу"),
+    ("через 1 минуту Чайник", datetime(2026, 10, 17, 12, 1), "Чайник"),
+    ("через час Позвонить", datetime(2026, 10, 17, 13, 0), "Позвонить"),
+    ("через 2 часа 30 минут Созвон", datetime(2026, 10, 17, 14, 30), "Созвон"),
+    ("через 1 час и 15 минут Выйти", datetime(2026, 10, 17, 13, 15), "Выйти"),
+    ("через полчаса Проверить почту", datetime(2026, 10, 17, 12, 30), "Проверить почту"),
+    ("через 3 дня Оплатить счёт", datetime(2026, 10, 20, 12, 0), "Оплатить счёт"),
+    ("через неделю Отчёт", datetime(2026, 10, 24, 12, 0), "Отчёт"),
+    ("через 2 дня в 10:00 Врач", datetime(2026, 10, 19, 10, 0), "Врач"),
+    ("ЧЕРЕЗ 10 МИН Таймер", datetime(2026, 10, 17, 12, 10), "Таймер"),
+    ("в 18:30 Встреча с командой", datetime(2026, 10, 17, 18, 30), "Встреча с командой"),
+    ("в 9:00 Зарядка", datetime(2026, 10, 18, 9, 0), "Зарядка"),
+    ("в 12:00 Обед", datetime(2026, 10, 18, 12, 0), "Обед"),
+    ("сегодня в 20:00 Кино", datetime(2026, 10, 17, 20, 0), "Кино"),
+    ("завтра Купить хлеб", datetime(2026, 10, 18, 9, 0), "Купить хлеб"),
+    ("завтра в 7:30 Пробежка", datetime(2026, 10, 18, 7, 30), "Пробежка"),
+    ("в 7:30 завтра Пробежка", datetime(2026, 10, 18, 7, 30), "Пробежка"),
+    ("послезавтра в 10:00 Ревью", datetime(2026, 10, 19, 10, 0), "Ревью"),
+    ("в понедельник Планёрка", datetime(2026, 10, 19, 9, 0), "Планёрка"),
+    ("во вторник в 11:00 Демо", datetime(2026, 10, 20, 11, 0), "Демо"),
+    ("в пятницу в 18:00 Пятничный созвон", datetime(2026, 10, 23, 18, 0), "Пятничный созвон"),
+    ("в субботу в 13:00 Рынок", datetime(2026, 10, 17, 13, 0), "Рынок"),
+    ("в субботу в 11:00 Рынок", datetime(2026, 10, 24, 11, 0), "Рынок"),
+    ("15.03 День рождения", datetime(2027, 3, 15, 9, 0), "День рождения"),
+    ("15.03.2027 в 10:00 Экзамен", datetime(2027, 3, 15, 10, 0), "Экзамен"),
+    ("01.11.26 Налоги", datetime(2026, 11, 1, 9, 0), "Налоги"),
+    ("20 октября в 19:00 Концерт", datetime(2026, 10, 20, 19, 0), "Концерт"),
+    ("1 января 2027 Праздник", datetime(2027, 1, 1, 9, 0), "Праздник"),
+    ("29.02 Високосный день", datetime(2028, 2, 29, 9, 0), "Високосный день"),
+    ("завтра и послезавтра Дежурство", datetime(2026, 10, 18, 9, 0), "и послезавтра Дежурство"),
+    ("в 18:30", datetime(2026, 10, 17, 18, 30), ""),
+    ("через магазин зайти", None, None),
+    ("в магазин", None, None),
+    ("в 25:00 Ночь", None, None),
+    ("31.02 Нет такой даты", None, None),
+    ("Купить молоко", None, None),
+    ("", None, None),
+]
+
+CORPUS_PHRASES = [
+    "через {n} минут", "через {n} часа", "через {n} час {m} минут", "через полчаса",
+    "в {h}:{mm}", "завтра в {h}:{mm}", "в пятницу в {h}:{mm}", "через {n} дня", "{d}.{mo} в {h}:{mm}",
+]
+CORPUS_TEXTS = ["Закрыть задачу", "Позвонить маме", "Встреча с командой", "Купить продукты", "Выпить воду"]
+
+
+def legacy_parse(command_text: str, now: datetime) -> tuple[datetime, str] | None:
+    """Прежний разбор из command_set_reminder_handler и parse_time."""
+    time_match = re.search(r'(через\s+\d+\s+(минут|час|часа|часов)|в\s+\d{1,2}:\d{2})', command_text, re.IGNORECASE)
+    if not time_match:
+        return None
+    time_str = time_match.group(0)
+    reminder_text = command_text[len(time_str):].strip()
+
+    match_relative = re.match(r'через\s+(\d+)\s+(минут|час|часа|часов)', time_str, re.IGNORECASE)
+    if match_relative:
+        value = int(match_relative.group(1))
+        unit = match_relative.group(2).lower()
+        delta = timedelta(minutes=value) if 'минут' in unit else timedelta(hours=value)
+        return now + delta, reminder_text
+
+    match_absolute = re.match(r'в\s+(\d{1,2}):(\d{2})', time_str)
+    if match_absolute:
+        target_time = now.replace(hour=int(match_absolute.group(1)), minute=int(match_absolute.group(2)), second=0, microsecond=0)
+        if target_time <= now:
+            target_time += timedelta(days=1)
+        return target_time, reminder_text
+    return None
+
+
+def parse_uncached(text: str, now: datetime) -> tuple[datetime, str] | None:
+    """parse_reminder без кэша фраз."""
+    spec, end = _scan(text)
+    if spec is None:
+        return None
+    return spec.resolve(now), text[end:].strip()
+
+
+def check_cases() -> int:
+    failures = 0
+    for text, expected_time, expected_text in CASES:
+        parsed = parse_reminder(text, NOW)
+        expected = None if expected_time is None else (expected_time, expected_text)
+        if parsed != expected:
+            failures += 1
+            print(f"ОШИБКА: {text!r}: ожидалось {expected}, получено {parsed}")
+    print(f"Проверка: {len(CASES) - failures}/{len(CASES)} фраз разобраны верно")
+    return failures
+
+
+def make_corpus(count: int, distinct: int, seed: int = 1) -> list[str]:
+    """
+    Корпус сообщений, где повторяются distinct разных фраз о времени (как у реальных пользователей),
+    а текст напоминания у каждого сообщения свой.
+    """
+    rng = random.Random(seed)
+    phrases = []
+    for _ in range(distinct):
+        template = rng.choice(CORPUS_PHRASES)
+        phrase = template.format(
+            n=rng.randint(1, 12), m=rng.randint(1, 59), h=rng.randint(0, 23), mm=f"{rng.randint(0, 59):02d}",
+            d=rng.randint(1, 28), mo=rng.randint(1, 12),
+        )
+        phrases.append(phrase)
+    return [f"{rng.choice(phrases)} {rng.choice(CORPUS_TEXTS)} №{index}" for index in range(count)]
+
+
+def measure(name: str, parse, corpus: list[str]) -> None:
+    started = time.perf_counter()
+    recognized = sum(1 for text in corpus if parse(text, NOW) is not None)
+    elapsed = time.perf_counter() - started
+    print(f"{name}: {len(corpus) / elapsed:,.0f} сообщений/с, распознано {recognized}/{len(corpus)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Корректность и скорость разбора времени напоминаний")
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--distinct", type=int, default=2_000, help="Число различных формулировок в корпусе")
+    args = parser.parse_args()
+
+    failures = check_cases()
+    corpus = make_corpus(args.messages, args.distinct)
+
+    measure("Было (три регулярных выражения)", legacy_parse, corpus)
+    measure("Стало, без кэша", parse_uncached, corpus)
+    _scan_phrase.cache_clear()
+    measure("Стало, с кэшем", parse_reminder, corpus)
+    print(f"Кэш фраз: {_scan_phrase.cache_info()}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
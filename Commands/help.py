@@ -20,7 +20,13 @@ HELP_MESSAGE = """
 • <b>/complete_task &lt;номер&gt;</b> - Отметить задачу как выполненную (скоро)
 
 <b>Напоминания:</b>
-• <b>/set_reminder &lt;время&gt; &lt;сообщение&gt;</b> - Установить напоминание (скоро)
+• <b>/set_reminder &lt;время&gt; &lt;сообщение&gt;</b> - Установить напоминание
+  (<i>через 1 час 30 минут</i>, <i>в 18:30</i>, <i>завтра в 9:00</i>, <i>в пятницу</i>, <i>15.03 в 10:00</i>)
+  Повторяющиеся: <i>каждый день в 9:00</i>, <i>каждые 2 часа</i>, <i>по будням в 9:30</i>, <i>каждую пятницу</i>
+  Несколько напоминаний сразу — по одному на строку, каждое со своим временем
+• <b>/list_reminders</b> - Показать запланированные напоминания
+• <b>/cancel_reminder &lt;ID&gt;</b> - Отменить одно напоминание
+• <b>/cancel_reminders</b> - Отменить все запланированные напоминания
 
 <b>Другое:</b>
 • <b>/ask &lt;ваш вопрос&gt;</b> - Задать вопрос ИИ-ассистенту (скоро)
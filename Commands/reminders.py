@@ -1,13 +1,28 @@
 from aiogram import Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery, InlineKeyboardMarkup, Message
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.fsm.context import FSMContext
-import asyncio
+import html
 import logging
-import re
-from datetime import datetime, timedelta
+from datetime import datetime
+from Database import connection
 from Database.models import Reminder # <-- Импортируем модель
-from pydantic import ValidationError # Импортируем ValidationError
+from Scheduler.scheduler import ReminderScheduler
+from Scheduler.entry import ScheduledReminder, RecurringReminder, DigestReminder, DIGEST_HEADER
+from Scheduler.recurrence import next_occurrence, describe_rule
+from Scheduler.catchup import CatchUpPlanner
+from Scheduler.watcher import ReminderWatcher, WATCH_ENABLED
+from Scheduler.loader import PendingReminderLoader
+from Scheduler.status_writer import StatusWriteBuffer
+from Scheduler.delivery import DeliveryQueue, PERMANENT_ERRORS
+from Scheduler.leases import LeaseManager, LEASES_ENABLED
+from Scheduler.user_view import UserReminderView, ListedReminder
+from time_parser import parse_reminder, parse_recurring, scan, scan_recurring
+from throttling import PendingCounter
+from metrics import SCHEDULED_REMINDERS, DELIVERY_QUEUE_SIZE, SCHEDULER_LAG, REMINDER_SENDS
 
 # Создаём роутер для команд, связанных с напоминаниями
 router = Router()
@@ -22,71 +37,149 @@ def set_bot_instance(bot):
     bot_instance = bot
     logger.info("Экземпляр бота установлен для модуля напоминаний.")
 
-def parse_time(time_str: str) -> timedelta | datetime | None:
-    """
-    Простой парсер времени.
-    Поддерживает форматы:
-    - "через N минут/часов" (например, "через 5 минут", "через 1 час")
-    - "в HH:MM" (например, "в 18:30")
-    Возвращает timedelta или datetime, или None, если не удалось распознать.
-    """
-    now = datetime.now()
+# Буфер отложенной записи статусов доставки
+status_writer = StatusWriteBuffer()
 
-    # Паттерн для "через N минут/часов"
-    match_relative = re.match(r'через\s+(\d+)\s+(минут|час|часа|часов)', time_str, re.IGNORECASE)
-    if match_relative:
-        value = int(match_relative.group(1))
-        unit = match_relative.group(2).lower()
-        if 'минут' in unit:
-            return timedelta(minutes=value)
-        elif 'час' in unit: # покрывает "час", "часа", "часов"
-            return timedelta(hours=value)
-
-    # Паттерн для "в HH:MM"
-    match_absolute = re.match(r'в\s+(\d{1,2}):(\d{2})', time_str)
-    if match_absolute:
-        hour = int(match_absolute.group(1))
-        minute = int(match_absolute.group(2))
-        target_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-        if target_time <= now: # Если указанное время уже прошло сегодня, предполагаем завтра
-            target_time += timedelta(days=1)
-        return target_time - now # Возвращаем timedelta до цели
-
-    return None # Не удалось распознать
+# Неотправленные напоминания пользователей для лимита без count-запроса на каждую команду
+pending_counter = PendingCounter()
+
+# Списки напоминаний пользователей для /list_reminders
+user_view = UserReminderView()
+LIST_PAGE_SIZE = 5
+# Сколько напоминаний можно создать одним сообщением
+MAX_BULK_LINES = 50
 
 async def send_reminder(chat_id: int, text: str, reminder_id: str):
-    """Асинхронная задача, которая отправляет напоминание и обновляет статус в БД."""
+    """Отправляет напоминание. Ошибки пробрасываются в очередь доставки для повторных попыток."""
     global bot_instance
     if not bot_instance:
-        logger.error("send_reminder: bot_instance не установлен!")
-        return
+        raise RuntimeError("send_reminder: bot_instance не установлен!")
 
-    # --- ОБРАЩАЕМСЯ К db ЧЕРЕЗ МОДУЛЬ connection ---
-    from Database.connection import db # Импортируем внутри функции, когда она выполняется
-    # ---
+    await bot_instance.send_message(chat_id=chat_id, text=f"⏰ Напоминание: {text}")
+    logger.info("Напоминание %s отправлено пользователю %s: %s", reminder_id, chat_id, text)
 
-    try:
-        await bot_instance.send_message(chat_id=chat_id, text=f"⏰ Напоминание: {text}")
-        logger.info(f"Напоминание отправлено пользователю {chat_id}: {text}")
+async def send_digest(digest: DigestReminder):
+    """Отправляет одну сводку о нескольких пропущенных напоминаниях чата."""
+    global bot_instance
+    if not bot_instance:
+        raise RuntimeError("send_digest: bot_instance не установлен!")
 
-        # Обновляем статус в БД
-        await db["reminders"].update_one(
-            {"id": reminder_id, "is_sent": False}, # Убедимся, что не отправлено дважды
-            {"$set": {"is_sent": True, "sent_at": datetime.now()}}
-        )
-        logger.debug(f"Статус напоминания {reminder_id} обновлён на 'отправлено' в БД.")
-    except Exception as e:
-        logger.error(f"Ошибка при отправке напоминания пользователю {chat_id} или обновлении БД: {e}")
-        # Попробовать обновить статус, даже если отправка не удалась
-        try:
-            await db["reminders"].update_one(
-                {"id": reminder_id},
-                {"$set": {"is_sent": True, "sent_at": datetime.now(), "error_on_send": str(e)}}
-            )
-        except Exception as db_e:
-            logger.error(f"Ошибка при обновлении статуса ошибки в БД: {db_e}")
-
-async def schedule_reminder_from_db(reminder: Reminder):
+    await bot_instance.send_message(chat_id=digest.chat_id, text=DIGEST_HEADER + digest.reminder_text)
+    logger.info("Сводка из %s напоминаний отправлена пользователю %s.", len(digest.reminders), digest.chat_id)
+
+async def deliver_reminder(reminder: ScheduledReminder):
+    if isinstance(reminder, DigestReminder):
+        await send_digest(reminder)
+    else:
+        await send_reminder(reminder.chat_id, reminder.reminder_text, reminder.id)
+
+def _delivered(reminder: ScheduledReminder) -> list[ScheduledReminder]:
+    # Сводка закрывает сразу все вошедшие в неё напоминания
+    if isinstance(reminder, DigestReminder):
+        return reminder.reminders
+    return [reminder]
+
+def advance_recurring(reminder: RecurringReminder, fired_at: datetime, reschedule: bool = True):
+    """Сдвигает правило повторения на следующее срабатывание вместо того, чтобы закрыть напоминание."""
+    next_at = next_occurrence(reminder.recurrence, reminder.occurrence, fired_at)
+    # Отменённое во время отправки правило уже удалено из БД, ставить его снова не нужно
+    schedule_now = reschedule and loader.covers(next_at)
+    lease = {}
+    if loader.leases:
+        # Следующее срабатывание за пределами окна может забрать любой воркер
+        lease = loader.leases.new_lease() if schedule_now else {"lease_owner": None, "lease_expires_at": None}
+    status_writer.mark_advanced(reminder.id, reminder.occurrence, next_at, fired_at, lease)
+    # Не перенос найденной записи: get() мог уже отбросить сработавшее правило как прошедшее
+    user_view.add(reminder.user_id, ListedReminder(next_at, reminder.id, reminder.reminder_text, reminder.recurrence))
+    if schedule_now:
+        scheduler.schedule(reminder.advanced(next_at))
+    logger.debug("Повторяющееся напоминание %s перенесено на %s.", reminder.id, next_at)
+
+def on_reminder_sent(reminder: ScheduledReminder):
+    REMINDER_SENDS.inc("success")
+    active = scheduler.is_active(reminder.id)
+    scheduler.complete(reminder.id)
+    # Статус записывается в БД пакетно, в фоне
+    sent_at = datetime.now()
+    for delivered in _delivered(reminder):
+        if isinstance(delivered, RecurringReminder):
+            advance_recurring(delivered, sent_at, reschedule=active)
+        else:
+            status_writer.mark_sent(delivered.id, sent_at)
+            pending_counter.discard(delivered.user_id)
+            user_view.discard(delivered.user_id, delivered.id)
+
+def on_reminder_failed(reminder: ScheduledReminder, error: Exception):
+    REMINDER_SENDS.inc("error")
+    active = scheduler.is_active(reminder.id)
+    scheduler.complete(reminder.id)
+    logger.error(f"Не удалось отправить напоминание {reminder.id} пользователю {reminder.chat_id}: {error}")
+    # Помечаем напоминание, чтобы не пытаться отправить его снова
+    failed_at = datetime.now()
+    permanent = isinstance(error, PERMANENT_ERRORS)
+    for delivered in _delivered(reminder):
+        if isinstance(delivered, RecurringReminder) and not permanent:
+            # Временный сбой (сеть, исчерпанные попытки) пропускает одно срабатывание, но не останавливает правило
+            advance_recurring(delivered, failed_at, reschedule=active)
+            continue
+        status_writer.mark_failed(delivered.id, failed_at, str(error))
+        pending_counter.discard(delivered.user_id)
+        user_view.discard(delivered.user_id, delivered.id)
+
+def on_reminder_expired(reminder: ScheduledReminder):
+    if isinstance(reminder, RecurringReminder):
+        # Пропущенное срабатывание не отменяет правило
+        advance_recurring(reminder, datetime.now())
+        return
+    logger.info("Напоминание %s просрочено сильнее порога и не будет отправлено.", reminder.id)
+    status_writer.mark_expired(reminder.id, datetime.now())
+    pending_counter.discard(reminder.user_id)
+    user_view.discard(reminder.user_id, reminder.id)
+
+# Очередь исходящих сообщений с учётом лимитов Telegram
+delivery_queue = DeliveryQueue(
+    deliver_reminder,
+    on_reminder_sent,
+    on_reminder_failed,
+    is_active=lambda reminder: scheduler.is_active(reminder.id),
+)
+
+async def fire_reminder(reminder: ScheduledReminder):
+    """Вызывается планировщиком, когда наступило время напоминания."""
+    SCHEDULER_LAG.observe(max((datetime.now() - reminder.target_datetime).total_seconds(), 0))
+    delivery_queue.put(reminder)
+
+# Единый планировщик для всех напоминаний процесса
+scheduler = ReminderScheduler(fire_reminder)
+
+# Просроченные напоминания копятся при загрузке окна и раскладываются догоняющим режимом
+catchup = CatchUpPlanner(scheduler.schedule, on_reminder_expired)
+
+SCHEDULED_REMINDERS.set_function(lambda: len(scheduler))
+DELIVERY_QUEUE_SIZE.set_function(lambda: len(delivery_queue))
+
+def start_scheduler():
+    """Запускает фоновые задачи планировщика, очереди доставки и записи статусов."""
+    status_writer.start()
+    delivery_queue.start()
+    scheduler.start()
+
+async def stop_scheduler():
+    """Останавливает фоновую задачу планировщика, дозагрузку окна и очередь доставки."""
+    await loader.stop()
+    if watcher is not None:
+        await watcher.stop()
+    await scheduler.stop()
+    await delivery_queue.stop()
+    # Сначала записываем статусы, затем отдаём аренды другим воркерам
+    await status_writer.flush()
+    await loader.release_leases()
+
+async def flush_status_updates():
+    """Останавливает буфер статусов и записывает всё накопленное в БД."""
+    await status_writer.stop()
+
+async def schedule_reminder_from_db(reminder: ScheduledReminder):
     """Планирует задачу напоминания на основе данных из БД."""
     global bot_instance
     if not bot_instance:
@@ -96,59 +189,112 @@ async def schedule_reminder_from_db(reminder: Reminder):
     # Вычисляем задержку в секундах
     now = datetime.now()
     if reminder.target_datetime <= now:
-        # Если время уже прошло, отправляем немедленно (или с минимальной задержкой)
-        delay_seconds = 0
-        logger.warning(f"Напоминание {reminder.id} для {reminder.user_id} уже просрочено. Отправляем немедленно.")
-    else:
-        delay_seconds = (reminder.target_datetime - now).total_seconds()
+        # Просроченные напоминания отправляются догоняющим режимом после загрузки окна
+        if not scheduler.is_active(reminder.id):
+            logger.debug("Напоминание %s для %s уже просрочено, передаём в догоняющий режим.", reminder.id, reminder.user_id)
+            catchup.add(reminder)
+        return
 
-    if delay_seconds < 0:
-        delay_seconds = 0 # На всякий случай
+    delay_seconds = (reminder.target_datetime - now).total_seconds()
+    logger.debug("Планирование напоминания %s через %s секунд.", reminder.id, delay_seconds)
 
-    logger.info(f"Планирование напоминания {reminder.id} через {delay_seconds} секунд.")
+    # Передаём напоминание единому планировщику вместо отдельной задачи
+    scheduler.schedule(reminder)
 
-    # Создаём асинхронную задачу
-    task = asyncio.create_task(asyncio.sleep(delay_seconds))
-    task.add_done_callback(
-        lambda t: asyncio.create_task(send_reminder(reminder.chat_id, reminder.reminder_text, reminder.id))
-    )
+async def flush_before_load() -> bool:
+    """
+    Сдвиги повторяющихся напоминаний за окно копятся в буфере статусов;
+    курсор дозагрузки должен видеть их новые сроки, а не прежние (уже за границей окна).
+    """
+    await status_writer.flush()
+    return not len(status_writer)
+
+# Загрузчик окна ближайших напоминаний (с арендой, если запущено несколько воркеров)
+loader = PendingReminderLoader(
+    schedule_reminder_from_db,
+    leases=LeaseManager() if LEASES_ENABLED else None,
+    after_load=catchup.flush,
+    before_load=flush_before_load,
+)
+
+async def schedule_watched_reminder(reminder: ScheduledReminder):
+    """Планирует напоминание, пришедшее из отслеживания изменений БД."""
+    await schedule_reminder_from_db(reminder)
+    # Просроченное сразу раскладываем, не дожидаясь следующей загрузки окна
+    catchup.flush()
+
+# Отслеживание напоминаний, добавленных в БД другими процессами (опционально)
+watcher = ReminderWatcher(
+    schedule_watched_reminder,
+    scheduler.cancel,
+    loader.covers,
+    scheduler.is_active,
+    leases=loader.leases,
+) if WATCH_ENABLED else None
 
 async def load_pending_reminders():
-    """Загружает из БД и планирует все неотправленные напоминания."""
+    """
+    Загружает из БД и планирует неотправленные напоминания в пределах окна предзагрузки.
+    Ошибка загрузки пробрасывается (фаза preload запуска помечается failed),
+    но фоновая дозагрузка запускается в любом случае и повторит загрузку окна.
+    """
     logger.info("Загрузка неотправленных напоминаний из БД...")
     try:
-        # --- ОБРАЩАЕМСЯ К db ЧЕРЕЗ МОДУЛЬ connection ---
-        from Database.connection import db # Импортируем внутри функции, когда она выполняется
-        # ---
-        if db is None:
-            logger.critical("Переменная db не инициализирована! Подключение к MongoDB не выполнено?")
-            return # <-- Добавим проверку на всякий случай
-
-        # Ищем все напоминания, которые ещё не были отправлены
-        pending_reminders_docs = await db["reminders"].find({"is_sent": False}).to_list(length=1000) # Ограничим для безопасности
-        logger.info(f"Найдено {len(pending_reminders_docs)} неотправленных документов в БД.")
-
-        for reminder_doc in pending_reminders_docs:
-            # Удаляем '_id' из словаря, если он есть
-            reminder_doc.pop('_id', None)
-
-            try:
-                # Создаём объект Reminder из данных БД
-                reminder = Reminder(**reminder_doc)
-                logger.debug(f"Успешно создан объект Reminder из БД для id: {reminder.id}")
-                # Планируем его
-                asyncio.create_task(schedule_reminder_from_db(reminder))
-            except ValidationError as ve:
-                logger.error(f"Ошибка валидации при создании Reminder из документа БД: {reminder_doc}. Ошибка: {ve}")
-                # Продолжаем обработку следующих документов
-                continue
-            except Exception as e:
-                logger.error(f"Неожиданная ошибка при создании Reminder из документа БД: {reminder_doc}. Ошибка: {e}")
-                # Продолжаем обработку следующих документов
-                continue
-
+        await loader.load_window()
     except Exception as e:
         logger.error(f"Ошибка при загрузке напоминаний из БД: {e}")
+        raise
+    finally:
+        # Окно дальше сдвигается фоновой дозагрузкой
+        loader.start()
+        if watcher is not None:
+            if connection.db is None:
+                logger.warning("Отслеживание изменений работает только с MongoDB, REMINDER_WATCH_ENABLED игнорируется.")
+            else:
+                watcher.start()
+
+
+def should_schedule_created(reminder_obj: Reminder) -> bool:
+    """
+    Нужно ли планировать только что сохранённое напоминание в этом процессе.
+    Окно проверяется после записи: если загрузка окна прошла, пока шла вставка,
+    курсор мог не увидеть документ, а граница окна уже сдвинулась за его срок.
+    """
+    if reminder_obj.lease_owner is not None:
+        return True
+    # При аренде свободное напоминание заберёт следующая загрузка - она просматривает окно целиком
+    return loader.leases is None and loader.covers(reminder_obj.target_datetime)
+
+
+def starts_with_time(line: str) -> bool:
+    """Начинается ли строка с фразы о времени или с правила повторения."""
+    try:
+        return scan_recurring(line)[0] is not None or scan(line)[0] is not None
+    except (ValueError, OverflowError):
+        return False
+
+
+def parse_reminder_command(text: str, now: datetime) -> tuple[datetime, str, dict | None] | str | None:
+    """
+    Разбирает "<время> <текст>" для /set_reminder.
+    Возвращает (время, текст, правило повторения или None), текст ошибки,
+    или None, если время не распознано.
+    """
+    recurring = parse_recurring(text, now)
+    if recurring is not None:
+        recurrence, target_datetime, reminder_text = recurring
+    else:
+        parsed = parse_reminder(text, now)
+        if parsed is None:
+            return None
+        recurrence = None
+        target_datetime, reminder_text = parsed
+
+    if not reminder_text:
+        return "Пожалуйста, укажите текст напоминания после времени."
+    if target_datetime <= now:
+        return "Указанное время уже прошло."
+    return target_datetime, reminder_text, recurrence
 
 
 @router.message(Command('set_reminder'))
@@ -166,85 +312,179 @@ async def command_set_reminder_handler(message: Message, state: FSMContext) -> N
         await message.answer("❌ Пожалуйста, укажите время и сообщение для напоминания.\nПример: <code>/set_reminder через 5 минут Закрыть задачу</code> или <code>/set_reminder в 18:30 Встреча с командой</code>", parse_mode='HTML')
         return
 
-    # Простая логика: ищем "через N минут/часов" или "в HH:MM" и текст после
-    time_match = re.search(r'(через\s+\d+\s+(минут|час|часа|часов)|в\s+\d{1,2}:\d{2})', command_text, re.IGNORECASE)
-    if not time_match:
-        await message.answer("❌ Не удалось распознать формат времени. Попробуйте:\n<code>/set_reminder через 5 минут Текст напоминания</code>\n<code>/set_reminder в 18:30 Текст напоминания</code>", parse_mode='HTML')
+    # Несколько строк, каждая со своим временем - по напоминанию на строку, одним сообщением.
+    # Иначе это одно напоминание с многострочным текстом ("в 18:00 Купить:\nмолоко\nхлеб")
+    lines = [line.strip() for line in command_text.splitlines() if line.strip()]
+    if len(lines) > 1 and all(starts_with_time(line) for line in lines[1:]):
+        await set_reminders_bulk(message, lines)
         return
 
-    time_str = time_match.group(0)
-    reminder_text = command_text[len(time_str):].strip()
-
-    if not reminder_text:
-        await message.answer("❌ Пожалуйста, укажите текст напоминания после времени.")
+    # Время разбирается один раз относительно одного и того же момента now
+    now = datetime.now()
+    parsed = parse_reminder_command(command_text, now)
+    if parsed is None:
+        await message.answer("❌ Не удалось распознать формат времени. Попробуйте:\n<code>/set_reminder через 5 минут Текст напоминания</code>\n<code>/set_reminder в 18:30 Текст напоминания</code>\n<code>/set_reminder завтра в 9:00 Текст напоминания</code>\n<code>/set_reminder в пятницу в 18:00 Текст напоминания</code>\n<code>/set_reminder 15.03 в 10:00 Текст напоминания</code>\n<code>/set_reminder каждый день в 9:00 Текст напоминания</code>", parse_mode='HTML')
         return
-
-    # Парсим время
-    time_delta_or_datetime = parse_time(time_str)
-    if time_delta_or_datetime is None:
-        await message.answer("❌ Не удалось распознать указанное время. Попробуйте ещё раз.")
+    if isinstance(parsed, str):
+        await message.answer(f"❌ {parsed}")
         return
+    target_datetime, reminder_text, recurrence = parsed
 
-    # Вычисляем target_datetime
-    if isinstance(time_delta_or_datetime, timedelta):
-        target_datetime = datetime.now() + time_delta_or_datetime
-    else: # Это timedelta, возвращённый из parse_time для "в HH:MM"
-         # Пересчитаем корректное время
-        target_datetime = datetime.now() + time_delta_or_datetime
+    # --- Сохраняем напоминание в хранилище ---
+    repository = connection.reminders
+    if repository is None:
+        logger.critical("Хранилище напоминаний не инициализировано! Подключение к БД не выполнено?")
+        await message.answer("❌ Ошибка: бот не инициализирован для работы с базой данных.")
+        return
 
-    if target_datetime <= datetime.now():
-        await message.answer("❌ Указанное время уже прошло.")
+    try:
+        allowed = await pending_counter.can_add(message.from_user.id)
+    except Exception as e:
+        # Лимит - защитная мера, из-за ошибки подсчёта не отказываем в напоминании
+        logger.error(f"Ошибка при подсчёте напоминаний пользователя {message.from_user.id}: {e}")
+        allowed = True
+    if not allowed:
+        await message.answer(f"❌ У вас уже {pending_counter.limit} запланированных напоминаний — это максимум. Отмените ненужные: /cancel_reminder или /cancel_reminders")
         return
 
-    # --- Сохраняем напоминание в MongoDB ---
-    # --- ОБРАЩАЕМСЯ К db ЧЕРЕЗ МОДУЛЬ connection ---
-    from Database.connection import db # Импортируем внутри функции, когда она выполняется
-    # ---
-    if db is None:
-            logger.critical("Переменная db не инициализирована! Подключение к MongoDB не выполнено?")
-            await message.answer("❌ Ошибка: бот не инициализирован для работы с базой данных.")
-            return
+    # Напоминания за пределами окна будут подгружены загрузчиком позже
+    lease = loader.leases.new_lease() if loader.leases and loader.covers(target_datetime) else {}
 
     reminder_obj = Reminder(
         user_id=message.from_user.id,
         chat_id=message.chat.id,
         reminder_text=reminder_text,
-        target_datetime=target_datetime
+        target_datetime=target_datetime,
+        recurrence=recurrence,
+        **lease
     )
 
     try:
-        result = await db["reminders"].insert_one(reminder_obj.dict())
+        await repository.insert(reminder_obj)
         logger.info(f"Напоминание сохранено в БД с id: {reminder_obj.id}")
+        pending_counter.add(reminder_obj.user_id)
+        user_view.add(reminder_obj.user_id, ListedReminder(target_datetime, reminder_obj.id, reminder_text, recurrence))
     except Exception as e:
         logger.error(f"Ошибка при сохранении напоминания в БД: {e}")
         await message.answer("❌ Произошла ошибка при сохранении напоминания в базу данных.")
         return
 
     # --- Планируем задачу ---
-    asyncio.create_task(schedule_reminder_from_db(reminder_obj))
+    if should_schedule_created(reminder_obj):
+        await schedule_reminder_from_db(ScheduledReminder.from_reminder(reminder_obj))
 
     # Форматируем время для пользователя
     formatted_time = target_datetime.strftime("%H:%M %d.%m.%Y")
-    await message.answer(f"✅ Напоминание установлено на <b>{formatted_time}</b>:\n<i>{reminder_text}</i>", parse_mode='HTML')
+    if recurrence is not None:
+        await message.answer(f"🔁 Повторяющееся напоминание ({describe_rule(recurrence)}), первое — <b>{formatted_time}</b>:\n<i>{reminder_text}</i>\nОтменить: <code>/cancel_reminder {reminder_obj.id}</code>", parse_mode='HTML')
+    else:
+        await message.answer(f"✅ Напоминание установлено на <b>{formatted_time}</b>:\n<i>{reminder_text}</i>\nОтменить: <code>/cancel_reminder {reminder_obj.id}</code>", parse_mode='HTML')
     logger.info(f"Пользователь {message.from_user.full_name} (ID: {message.from_user.id}) установил напоминание '{reminder_text}' на {formatted_time}.")
 
 
+async def set_reminders_bulk(message: Message, lines: list[str]) -> None:
+    """
+    Пакетное создание: все строки проверяются заранее, сохраняются одним insert_many,
+    передаются планировщику одной пачкой, а пользователь получает один итоговый ответ.
+    """
+    user_id = message.from_user.id
+    if len(lines) > MAX_BULK_LINES:
+        await message.answer(f"❌ За один раз можно создать не больше {MAX_BULK_LINES} напоминаний.")
+        return
+
+    now = datetime.now()
+    parsed_lines = []
+    errors = []
+    for number, line in enumerate(lines, start=1):
+        parsed = parse_reminder_command(line, now)
+        if parsed is None:
+            errors.append(f"{number}. <i>{html.escape(line)}</i> — не удалось распознать время")
+        elif isinstance(parsed, str):
+            errors.append(f"{number}. <i>{html.escape(line)}</i> — {parsed[0].lower()}{parsed[1:]}")
+        else:
+            parsed_lines.append(parsed)
+    if errors:
+        await message.answer("❌ Напоминания не созданы. Исправьте строки:\n" + "\n".join(errors), parse_mode='HTML')
+        return
+
+    repository = connection.reminders
+    if repository is None:
+        logger.critical("Хранилище напоминаний не инициализировано! Подключение к БД не выполнено?")
+        await message.answer("❌ Ошибка: бот не инициализирован для работы с базой данных.")
+        return
+
+    try:
+        allowed = await pending_counter.can_add(user_id, len(parsed_lines))
+    except Exception as e:
+        logger.error(f"Ошибка при подсчёте напоминаний пользователя {user_id}: {e}")
+        allowed = True
+    if not allowed:
+        await message.answer(f"❌ Вместе с этими напоминаниями будет больше {pending_counter.limit} запланированных — это максимум. Отмените ненужные: /cancel_reminder или /cancel_reminders")
+        return
+
+    reminder_objs = []
+    for target_datetime, reminder_text, recurrence in parsed_lines:
+        # Напоминания за пределами окна будут подгружены загрузчиком позже
+        lease = loader.leases.new_lease() if loader.leases and loader.covers(target_datetime) else {}
+        reminder_objs.append(Reminder(
+            user_id=user_id,
+            chat_id=message.chat.id,
+            reminder_text=reminder_text,
+            target_datetime=target_datetime,
+            recurrence=recurrence,
+            **lease
+        ))
+
+    try:
+        result = await repository.insert_many(reminder_objs)
+    except Exception as e:
+        logger.error(f"Ошибка при пакетном сохранении напоминаний в БД: {e}")
+        await message.answer("❌ Произошла ошибка при сохранении напоминаний в базу данных.")
+        return
+
+    # Неудачные документы отбрасываем, остальные сохранены
+    saved_ids = set(result.saved)
+    saved = [reminder_obj for reminder_obj in reminder_objs if reminder_obj.id in saved_ids]
+    if result.failed:
+        logger.error(f"Пакетное сохранение напоминаний пользователя {user_id}: не сохранено {len(result.failed)}.")
+    for reminder_obj in saved:
+        pending_counter.add(user_id)
+        user_view.add(user_id, ListedReminder(reminder_obj.target_datetime, reminder_obj.id, reminder_obj.reminder_text, reminder_obj.recurrence))
+    scheduler.schedule_many([
+        ScheduledReminder.from_reminder(reminder_obj)
+        for reminder_obj in saved if should_schedule_created(reminder_obj)
+    ])
+
+    lines = [f"✅ Создано напоминаний: <b>{len(saved)}</b>"]
+    for reminder_obj in sorted(saved, key=lambda reminder_obj: reminder_obj.target_datetime):
+        repeat = f" 🔁 {describe_rule(reminder_obj.recurrence)}" if reminder_obj.recurrence else ""
+        lines.append(f"• <b>{reminder_obj.target_datetime.strftime('%H:%M %d.%m')}</b>{repeat} — <i>{html.escape(reminder_obj.reminder_text)}</i>")
+    if len(saved) < len(reminder_objs):
+        lines.append(f"⚠️ Не удалось сохранить: {len(reminder_objs) - len(saved)}")
+    lines.append("Список и отмена: /list_reminders")
+    await message.answer("\n".join(lines), parse_mode='HTML')
+    logger.info(f"Пользователь {message.from_user.full_name} (ID: {user_id}) создал {len(saved)} напоминаний одним сообщением.")
+
+
 # --- Команда для отмены напоминаний (опционально) ---
 @router.message(Command('cancel_reminders'))
 async def command_cancel_reminders_handler(message: Message) -> None:
     user_id = message.from_user.id
-    # --- ОБРАЩАЕМСЯ К db ЧЕРЕЗ МОДУЛЬ connection ---
-    from Database.connection import db # Импортируем внутри функции, когда она выполняется
-    # ---
-    if db is None:
-        logger.critical("Переменная db не инициализирована! Подключение к MongoDB не выполнено?")
+    repository = connection.reminders
+    if repository is None:
+        logger.critical("Хранилище напоминаний не инициализировано! Подключение к БД не выполнено?")
         await message.answer("❌ Ошибка: бот не инициализирован для работы с базой данных.")
         return
     try:
-        result = await db["reminders"].delete_many(
-            {"user_id": user_id, "is_sent": False}
-        )
-        deleted_count = result.deleted_count
+        deleted_count = await repository.delete_user_pending(user_id)
+        # Освобождаем таймеры пользователя, чтобы отменённые напоминания не были отправлены,
+        # включая прочитанные загрузкой окна, но ещё не запланированные, и ждущие догоняющего режима
+        released = scheduler.cancel_user(user_id)
+        loader.discard_user(user_id)
+        catchup.discard_user(user_id)
+        pending_counter.reset(user_id)
+        user_view.clear(user_id)
+        logger.debug("Освобождено %s таймеров пользователя %s.", released, user_id)
         await message.answer(f"✅ Отменено {deleted_count} запланированных напоминаний.")
         logger.info(f"Пользователь {message.from_user.full_name} (ID: {message.from_user.id}) отменил {deleted_count} напоминаний.")
     except Exception as e:
@@ -252,4 +492,107 @@ async def command_cancel_reminders_handler(message: Message) -> None:
         await message.answer("❌ Произошла ошибка при отмене напоминаний.")
 
 
-__all__ = ["router", "set_bot_instance", "load_pending_reminders"]
\ No newline at end of file
+
+# --- Команда для отмены одного напоминания ---
+@router.message(Command('cancel_reminder'))
+async def command_cancel_reminder_handler(message: Message) -> None:
+    user_id = message.from_user.id
+    reminder_id = message.text[len('/cancel_reminder'):].strip()
+    if not reminder_id:
+        await message.answer("❌ Укажите ID напоминания.\nПример: <code>/cancel_reminder 1b9d6bcd-bbfd-4b2d-9b5d-ab8dfbbd4bed</code>", parse_mode='HTML')
+        return
+
+    repository = connection.reminders
+    if repository is None:
+        logger.critical("Хранилище напоминаний не инициализировано! Подключение к БД не выполнено?")
+        await message.answer("❌ Ошибка: бот не инициализирован для работы с базой данных.")
+        return
+    try:
+        # user_id в фильтре не даёт отменить чужое напоминание
+        deleted = await repository.delete_pending(reminder_id, user_id)
+    except Exception as e:
+        logger.error(f"Ошибка при отмене напоминания {reminder_id} для {user_id}: {e}")
+        await message.answer("❌ Произошла ошибка при отмене напоминания.")
+        return
+
+    if not deleted:
+        await message.answer("❌ Напоминание не найдено или уже отправлено.")
+        return
+
+    scheduler.cancel(reminder_id)
+    loader.discard(reminder_id)
+    catchup.discard(reminder_id)
+    pending_counter.discard(user_id)
+    user_view.discard(user_id, reminder_id)
+    await message.answer("✅ Напоминание отменено.")
+    logger.info(f"Пользователь {message.from_user.full_name} (ID: {user_id}) отменил напоминание {reminder_id}.")
+
+# --- Список напоминаний с постраничной навигацией ---
+class ReminderListPage(CallbackData, prefix="reminders"):
+    page: int
+
+
+def render_reminder_page(items: list[ListedReminder], page: int) -> tuple[str, InlineKeyboardMarkup | None]:
+    """Текст страницы списка и клавиатура навигации."""
+    if not items:
+        return "📭 У вас нет запланированных напоминаний.", None
+
+    pages = (len(items) + LIST_PAGE_SIZE - 1) // LIST_PAGE_SIZE
+    page = min(max(page, 0), pages - 1)
+    start = page * LIST_PAGE_SIZE
+
+    lines = [f"<b>🗓 Ваши напоминания</b> ({len(items)}):"]
+    for number, item in enumerate(items[start:start + LIST_PAGE_SIZE], start=start + 1):
+        repeat = f" 🔁 {describe_rule(item.recurrence)}" if item.recurrence else ""
+        lines.append(
+            f"\n{number}. <b>{item.target_datetime.strftime('%H:%M %d.%m.%Y')}</b>{repeat}\n"
+            f"<i>{html.escape(item.reminder_text)}</i>\n"
+            f"<code>/cancel_reminder {item.id}</code>"
+        )
+
+    if pages == 1:
+        return "\n".join(lines), None
+    builder = InlineKeyboardBuilder()
+    builder.button(text="◀️", callback_data=ReminderListPage(page=(page - 1) % pages))
+    builder.button(text=f"{page + 1}/{pages}", callback_data=ReminderListPage(page=page))
+    builder.button(text="▶️", callback_data=ReminderListPage(page=(page + 1) % pages))
+    return "\n".join(lines), builder.as_markup()
+
+
+@router.message(Command('list_reminders'))
+async def command_list_reminders_handler(message: Message) -> None:
+    user_id = message.from_user.id
+    if connection.reminders is None and not user_view.is_cached(user_id):
+        logger.critical("Хранилище напоминаний не инициализировано! Подключение к БД не выполнено?")
+        await message.answer("❌ Ошибка: бот не инициализирован для работы с базой данных.")
+        return
+    try:
+        items = await user_view.get(user_id)
+    except Exception as e:
+        logger.error(f"Ошибка при получении списка напоминаний для {user_id}: {e}")
+        await message.answer("❌ Произошла ошибка при получении списка напоминаний.")
+        return
+
+    text, markup = render_reminder_page(items, 0)
+    await message.answer(text, reply_markup=markup, parse_mode='HTML')
+    logger.info(f"Пользователь {message.from_user.full_name} (ID: {user_id}) запросил список напоминаний ({len(items)}).")
+
+
+@router.callback_query(ReminderListPage.filter())
+async def reminder_list_page_handler(callback: CallbackQuery, callback_data: ReminderListPage) -> None:
+    # Список строится по пользователю, нажавшему кнопку, поэтому чужие напоминания не видны
+    try:
+        items = await user_view.get(callback.from_user.id)
+    except Exception as e:
+        logger.error(f"Ошибка при получении списка напоминаний для {callback.from_user.id}: {e}")
+        await callback.answer("❌ Произошла ошибка при получении списка напоминаний.")
+        return
+
+    text, markup = render_reminder_page(items, callback_data.page)
+    try:
+        await callback.message.edit_text(text, reply_markup=markup, parse_mode='HTML')
+    except TelegramBadRequest:
+        pass # Страница не изменилась
+    await callback.answer()
+
+__all__ = ["router", "set_bot_instance", "load_pending_reminders", "start_scheduler", "stop_scheduler", "flush_status_updates"]
\ No newline at end of file
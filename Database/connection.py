@@ -1,39 +1,118 @@
 # Библиотеки
 import logging
 import os
+import uuid
 
 from dotenv import load_dotenv
-from pymongo.errors import ServerSelectionTimeoutError
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError, ServerSelectionTimeoutError
 from motor.motor_asyncio import AsyncIOMotorClient
 
+from Database.models import MODELS, Reminder
+from Database.repository import ReminderRepository, MongoReminderRepository, MemoryReminderRepository
+from metrics import METRICS_ENABLED, mongo_listener
+
 load_dotenv('config.env')
 logger = logging.getLogger(__name__)
 
+# Хранилище напоминаний: mongo или memory (в памяти процесса, без MongoDB - для бенчмарков и отладки)
+DB_BACKEND = os.getenv("DB_BACKEND", "mongo").lower()
+
 # Подключение к БД
 MONGO_HOST = os.getenv("MONGO_HOST", "localhost")
 MONGO_PORT = int(os.getenv("MONGO_PORT", "27017"))
 MONGO_DB_NAME = os.getenv("MONGO_DB_NAME")
+MONGO_URI = os.getenv("MONGO_URI") # Если задан, заменяет MONGO_HOST/MONGO_PORT (replica set, авторизация)
+
+# Пул соединений и таймауты (по умолчанию - значения драйвера)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = os.getenv("MONGO_MAX_IDLE_TIME_MS")
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "20000"))
+MONGO_SOCKET_TIMEOUT_MS = os.getenv("MONGO_SOCKET_TIMEOUT_MS")
+
+# Гарантии чтения и записи
+MONGO_WRITE_CONCERN = os.getenv("MONGO_WRITE_CONCERN") # 1, majority, ...
+MONGO_WRITE_TIMEOUT_MS = os.getenv("MONGO_WRITE_TIMEOUT_MS")
+MONGO_JOURNAL = os.getenv("MONGO_JOURNAL") # true / false
+MONGO_READ_CONCERN = os.getenv("MONGO_READ_CONCERN") # local, majority, ...
+MONGO_READ_PREFERENCE = os.getenv("MONGO_READ_PREFERENCE", "primary")
+
+# Сжатие трафика: например "zstd,snappy,zlib" (zstd и snappy требуют пакетов zstandard / python-snappy)
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS")
+MONGO_ZLIB_LEVEL = os.getenv("MONGO_ZLIB_LEVEL")
 
 # Глобальные переменные
 mongo_client: AsyncIOMotorClient = None
-db = None
+db = None # Сырой доступ для аренд, change streams и архивации (только MongoDB)
+reminders: ReminderRepository | None = None # Хранилище напоминаний для хендлеров и планировщика
+
+# Параметры клиента Motor из config.env
+def client_options() -> dict:
+    options = {
+        'maxPoolSize': MONGO_MAX_POOL_SIZE,
+        'minPoolSize': MONGO_MIN_POOL_SIZE,
+        'serverSelectionTimeoutMS': MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'connectTimeoutMS': MONGO_CONNECT_TIMEOUT_MS,
+        'readPreference': MONGO_READ_PREFERENCE,
+        'appname': 'myra',
+    }
+    if MONGO_MAX_IDLE_TIME_MS:
+        options['maxIdleTimeMS'] = int(MONGO_MAX_IDLE_TIME_MS)
+    if MONGO_SOCKET_TIMEOUT_MS:
+        options['socketTimeoutMS'] = int(MONGO_SOCKET_TIMEOUT_MS)
+    if MONGO_WRITE_CONCERN:
+        options['w'] = int(MONGO_WRITE_CONCERN) if MONGO_WRITE_CONCERN.isdigit() else MONGO_WRITE_CONCERN
+    if MONGO_WRITE_TIMEOUT_MS:
+        options['wTimeoutMS'] = int(MONGO_WRITE_TIMEOUT_MS)
+    if MONGO_JOURNAL:
+        options['journal'] = MONGO_JOURNAL.lower() in ("1", "true", "yes")
+    if MONGO_READ_CONCERN:
+        options['readConcernLevel'] = MONGO_READ_CONCERN
+    if MONGO_COMPRESSORS:
+        options['compressors'] = MONGO_COMPRESSORS
+    if MONGO_ZLIB_LEVEL:
+        options['zlibCompressionLevel'] = int(MONGO_ZLIB_LEVEL)
+    return options
+
+# Подключение к выбранному хранилищу
+async def connect_database(ensure: bool = True):
+    global reminders
+
+    if DB_BACKEND == 'memory':
+        reminders = MemoryReminderRepository()
+        logger.warning("Используется хранилище напоминаний в памяти: данные не сохраняются между запусками.")
+        return
+    await connect_to_mongo(ensure)
 
 # Функция для подключения к MongoDB
-async def connect_to_mongo():
-    global mongo_client, db
+async def connect_to_mongo(ensure: bool = True):
+    """Подключается к MongoDB. ensure=False - индексы проверяются отдельно (см. main.py)."""
+    global mongo_client, db, reminders
 
     try:
         logger.info(f"Попытка подключения к базе данных.")
 
-        connection_string = f'mongodb://{MONGO_HOST}:{MONGO_PORT}/{MONGO_DB_NAME}'
-        mongo_client = AsyncIOMotorClient(connection_string)
+        connection_string = MONGO_URI or f'mongodb://{MONGO_HOST}:{MONGO_PORT}/{MONGO_DB_NAME}'
+        # Слушатель команд нужен только для метрик, без них он не подключается
+        event_listeners = [mongo_listener] if METRICS_ENABLED else []
+        mongo_client = AsyncIOMotorClient(connection_string, event_listeners=event_listeners, **client_options())
 
         await mongo_client.server_info()
 
         db = mongo_client[MONGO_DB_NAME]
+        reminders = MongoReminderRepository(db[Reminder.Collection.name])
 
         logger.info(f'Подключение к базе данных успешно.')
 
+        if ensure:
+            try:
+                await ensure_indexes()
+            except RuntimeError as e:
+                # Без части индексов запросы медленнее, но доставка работает
+                logger.error(str(e))
+
     except ServerSelectionTimeoutError as e:
         logger.critical(f'Ошибка подключения к MongoDB: {e}')
         raise
@@ -41,6 +120,72 @@ async def connect_to_mongo():
         logger.critical(f'Неожиданная ошибка при подключение к MongoDB: {e}')
         raise
 
+# Размер пачки обновлений при исправлении дубликатов id
+MIGRATION_BATCH_SIZE = 1000
+
+async def reassign_duplicate_ids(collection) -> int:
+    """
+    Разовая миграция перед созданием id_unique. Прежде default id вычислялся один раз при импорте,
+    и все напоминания одного процесса получали один и тот же id. Первый документ каждой группы
+    сохраняет id, остальным выдаются новые uuid. Возвращает количество исправленных документов.
+    """
+    fixed = 0
+    duplicates = collection.aggregate([
+        {'$group': {'_id': '$id', 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$gt': 1}}},
+    ], allowDiskUse=True)
+    async for group in duplicates:
+        updates = []
+        async for doc in collection.find({'id': group['_id']}, {'_id': 1}).sort('_id', 1).skip(1):
+            updates.append(UpdateOne({'_id': doc['_id']}, {'$set': {'id': str(uuid.uuid4())}}))
+            if len(updates) >= MIGRATION_BATCH_SIZE:
+                fixed += (await collection.bulk_write(updates, ordered=False)).modified_count
+                updates = []
+        if updates:
+            fixed += (await collection.bulk_write(updates, ordered=False)).modified_count
+    if fixed:
+        logger.warning(f'Коллекция {collection.name}: {fixed} напоминаний с повторяющимся id получили новые id.')
+    return fixed
+
+# Функция для создания индексов, объявленных в моделях
+async def ensure_indexes():
+    """
+    Создаёт недостающие индексы по одному: ошибка одного (например, дубликаты под уникальным)
+    не мешает остальным. Если что-то не создано, в конце выбрасывается RuntimeError.
+    """
+    if db is None:
+        return # Хранилище в памяти: индексы не нужны
+    failed = []
+    for model in MODELS:
+        collection = db[model.Collection.name]
+        declared = getattr(model.Collection, 'indexes', [])
+        existing = await collection.index_information()
+
+        missing = [spec for spec in declared if spec['name'] not in existing]
+        if not missing:
+            logger.info(f'Индексы коллекции {model.Collection.name} уже существуют.')
+            continue
+
+        if model is Reminder and any(spec['name'] == 'id_unique' for spec in missing):
+            try:
+                await reassign_duplicate_ids(collection)
+            except PyMongoError as e:
+                # id_unique тогда не создастся, но остальные индексы создаём
+                logger.error(f'Не удалось исправить повторяющиеся id напоминаний: {e}')
+
+        for spec in missing:
+            options = {key: value for key, value in spec.items() if key != 'keys'}
+            try:
+                await collection.create_index(spec['keys'], **options)
+            except PyMongoError as e:
+                logger.error(f'Не удалось создать индекс {spec["name"]} коллекции {model.Collection.name}: {e}')
+                failed.append(spec['name'])
+                continue
+            logger.info(f'Создан индекс {spec["name"]} коллекции {model.Collection.name}.')
+
+    if failed:
+        raise RuntimeError(f'Не созданы индексы: {", ".join(failed)}')
+
 async def close_mongo_connection():
     global mongo_client
 
@@ -48,4 +193,6 @@ async def close_mongo_connection():
         mongo_client.close()
         logger.info("Соединение с MongoDB закрыто.")
 
-__all__ = ['db', 'connect_to_mongo', 'close_mongo_connection']
\ No newline at end of file
+__all__ = [
+    'db', 'reminders', 'client_options', 'connect_database', 'connect_to_mongo', 'ensure_indexes', 'close_mongo_connection',
+]
\ No newline at end of file
@@ -2,19 +2,57 @@
 import uuid
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 class Reminder(BaseModel):
-    id: str = str(uuid.uuid4()) # UUID
+    id: str = Field(default_factory=lambda: str(uuid.uuid4())) # UUID
     user_id: int # ID пользователя в Telegram
     chat_id: int # ID чата Telegram
     reminder_text: str # Текст для напоминания
     target_datetime: datetime # Время, когда нужно напомнить
-    created_at: datetime = datetime.now() # Время создания
+    created_at: datetime = Field(default_factory=datetime.now) # Время создания
     is_sent: bool = False # Отправлено ли напоминание
     sent_at: Optional[datetime] = None # Время отправки
+    lease_owner: Optional[str] = None # Воркер, который доставляет напоминание
+    lease_expires_at: Optional[datetime] = None # Когда аренда истекает
+    recurrence: Optional[dict] = None # Правило повторения (см. Scheduler/recurrence.py)
+    occurrences: int = 0 # Сколько раз повторяющееся напоминание уже сработало
 
     class Collection:
         name = 'reminders'
+        archive_name = 'reminders_archive' # Куда переносятся отправленные напоминания (см. Database/retention.py)
+        # Индексы, создаваемые при подключении к БД (см. ensure_indexes)
+        indexes = [
+            {'keys': [('id', 1)], 'name': 'id_unique', 'unique': True},
+            {
+                'keys': [('is_sent', 1), ('target_datetime', 1)],
+                'name': 'pending_by_target',
+                'partialFilterExpression': {'is_sent': False},
+            },
+            {'keys': [('user_id', 1), ('is_sent', 1)], 'name': 'user_pending'},
+            {
+                'keys': [('user_id', 1), ('target_datetime', 1)],
+                'name': 'user_pending_by_target',
+                'partialFilterExpression': {'is_sent': False},
+            },
+            {
+                'keys': [('created_at', 1)],
+                'name': 'pending_by_created',
+                'partialFilterExpression': {'is_sent': False},
+            },
+            {
+                'keys': [('lease_owner', 1)],
+                'name': 'pending_by_lease_owner',
+                'partialFilterExpression': {'is_sent': False},
+            },
+            {
+                'keys': [('sent_at', 1)],
+                'name': 'sent_by_time',
+                'partialFilterExpression': {'is_sent': True},
+            },
+        ]
 
-__all__ = ['Reminder']
\ No newline at end of file
+# Модели, для коллекций которых создаются индексы
+MODELS = [Reminder]
+
+__all__ = ['Reminder', 'MODELS']
\ No newline at end of file
@@ -0,0 +1,296 @@
+# Библиотеки
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, NamedTuple, Union
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from Database.models import Reminder
+
+logger = logging.getLogger(__name__)
+
+# Поля, которые отдаются для списка напоминаний пользователя
+LIST_FIELDS = ('id', 'reminder_text', 'target_datetime', 'recurrence')
+
+
+# --- Типизированные операции пакетной записи статусов ---
+class MarkSent(NamedTuple):
+    reminder_id: str
+    sent_at: datetime
+
+
+class MarkFailed(NamedTuple):
+    reminder_id: str
+    failed_at: datetime
+    error: str
+
+
+class MarkExpired(NamedTuple):
+    reminder_id: str
+    expired_at: datetime
+
+
+class AdvanceRecurring(NamedTuple):
+    reminder_id: str
+    occurrence: datetime # Срок сработавшего повторения; по нему сдвиг идемпотентен
+    next_at: datetime
+    sent_at: datetime
+    lease: dict
+
+
+StatusUpdate = Union[MarkSent, MarkFailed, MarkExpired, AdvanceRecurring]
+
+
+class InsertResult(NamedTuple):
+    saved: list[str] # id сохранённых напоминаний
+    failed: list[str] # id напоминаний, которые сохранить не удалось
+
+
+class ReminderRepository(ABC):
+    """
+    Доступ к напоминаниям для хендлеров, планировщика и бенчмарков.
+    Реализации: MongoReminderRepository (рабочая) и MemoryReminderRepository
+    (в памяти процесса, для запуска без MongoDB).
+    """
+
+    @abstractmethod
+    async def insert(self, reminder: Reminder) -> None:
+        ...
+
+    @abstractmethod
+    async def insert_many(self, reminders: list[Reminder]) -> InsertResult:
+        ...
+
+    @abstractmethod
+    async def delete_pending(self, reminder_id: str, user_id: int) -> bool:
+        """Удаляет неотправленное напоминание пользователя. False, если его нет или оно уже отправлено."""
+
+    @abstractmethod
+    async def delete_user_pending(self, user_id: int) -> int:
+        ...
+
+    @abstractmethod
+    async def count_user_pending(self, user_id: int) -> int:
+        ...
+
+    @abstractmethod
+    async def list_user_pending(self, user_id: int, after: datetime, limit: int) -> list[dict]:
+        """Неотправленные напоминания пользователя позже after по возрастанию времени (поля LIST_FIELDS)."""
+
+    # Потоковые методы реализуются асинхронными генераторами: вызов сразу возвращает итератор
+    @abstractmethod
+    def window(self, after: datetime | None, horizon: datetime, batch_size: int) -> AsyncIterator[dict]:
+        """Неотправленные напоминания со сроком в (after, horizon] по возрастанию времени."""
+
+    @abstractmethod
+    async def apply_status_updates(self, updates: list[StatusUpdate]) -> None:
+        """Применяет пакет обновлений статуса. Операции идемпотентны, порядок не важен."""
+
+    @abstractmethod
+    def find_all(self) -> AsyncIterator[dict]:
+        """Все напоминания коллекции (для инструментов и бенчмарков)."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Удаляет все напоминания (только для бенчмарков)."""
+
+
+class MongoReminderRepository(ReminderRepository):
+    """Напоминания в коллекции MongoDB (Motor)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert(self, reminder: Reminder) -> None:
+        await self.collection.insert_one(reminder.dict())
+
+    async def insert_many(self, reminders: list[Reminder]) -> InsertResult:
+        if not reminders:
+            return InsertResult([], [])
+        try:
+            await self.collection.insert_many([reminder.dict() for reminder in reminders], ordered=False)
+        except BulkWriteError as e:
+            # ordered=False: остальные документы сохранены
+            failed_indexes = {error["index"] for error in e.details.get("writeErrors", [])}
+            logger.error(f"Пакетное сохранение напоминаний: {len(failed_indexes)} ошибок: {e}")
+            return InsertResult(
+                [reminder.id for index, reminder in enumerate(reminders) if index not in failed_indexes],
+                [reminders[index].id for index in sorted(failed_indexes)],
+            )
+        return InsertResult([reminder.id for reminder in reminders], [])
+
+    async def delete_pending(self, reminder_id: str, user_id: int) -> bool:
+        result = await self.collection.delete_one({"id": reminder_id, "user_id": user_id, "is_sent": False})
+        return result.deleted_count > 0
+
+    async def delete_user_pending(self, user_id: int) -> int:
+        result = await self.collection.delete_many({"user_id": user_id, "is_sent": False})
+        return result.deleted_count
+
+    async def count_user_pending(self, user_id: int) -> int:
+        return await self.collection.count_documents({"user_id": user_id, "is_sent": False})
+
+    async def list_user_pending(self, user_id: int, after: datetime, limit: int) -> list[dict]:
+        # Диапазон по индексу user_pending_by_target
+        cursor = self.collection.find(
+            {"user_id": user_id, "is_sent": False, "target_datetime": {"$gt": after}},
+            {'_id': 0, **{field: 1 for field in LIST_FIELDS}},
+        ).sort("target_datetime", 1).limit(limit)
+        return [doc async for doc in cursor]
+
+    async def window(self, after: datetime | None, horizon: datetime, batch_size: int) -> AsyncIterator[dict]:
+        from Scheduler.entry import SCHEDULED_PROJECTION
+        time_filter = {"$lte": horizon}
+        if after is not None:
+            time_filter["$gt"] = after
+        cursor = self.collection.find({"is_sent": False, "target_datetime": time_filter}, SCHEDULED_PROJECTION)
+        async for doc in cursor.sort("target_datetime", 1).batch_size(batch_size):
+            yield doc
+
+    async def apply_status_updates(self, updates: list[StatusUpdate]) -> None:
+        if updates:
+            await self.collection.bulk_write([self._to_write(update) for update in updates], ordered=False)
+
+    @staticmethod
+    def _to_write(update: StatusUpdate) -> UpdateOne:
+        if isinstance(update, MarkSent):
+            return UpdateOne(
+                {"id": update.reminder_id, "is_sent": False}, # Убедимся, что не отправлено дважды
+                {"$set": {"is_sent": True, "sent_at": update.sent_at}},
+            )
+        if isinstance(update, MarkFailed):
+            return UpdateOne(
+                {"id": update.reminder_id},
+                {"$set": {"is_sent": True, "sent_at": update.failed_at, "error_on_send": update.error}},
+            )
+        if isinstance(update, MarkExpired):
+            return UpdateOne(
+                {"id": update.reminder_id, "is_sent": False},
+                {"$set": {"is_sent": True, "sent_at": update.expired_at, "expired": True}},
+            )
+        return UpdateOne(
+            # Условие на срок делает сдвиг идемпотентным: одно срабатывание - один сдвиг
+            {"id": update.reminder_id, "is_sent": False, "target_datetime": update.occurrence},
+            {"$set": {"target_datetime": update.next_at, "last_sent_at": update.sent_at, **update.lease}, "$inc": {"occurrences": 1}},
+        )
+
+    async def find_all(self) -> AsyncIterator[dict]:
+        async for doc in self.collection.find({}, {'_id': 0}):
+            yield doc
+
+    async def clear(self) -> None:
+        await self.collection.drop()
+
+
+class MemoryReminderRepository(ReminderRepository):
+    """
+    Напоминания в памяти процесса с той же семантикой фильтров, что и у MongoDB.
+    Для бенчмарков и запуска без БД (DB_BACKEND=memory); аренды, change streams
+    и архивация с ним не работают, данные теряются при остановке.
+    """
+
+    def __init__(self):
+        self._docs: dict[str, dict] = {}
+        self._by_user: dict[int, set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    async def insert(self, reminder: Reminder) -> None:
+        if reminder.id in self._docs:
+            raise ValueError(f"Напоминание {reminder.id} уже существует")
+        self._docs[reminder.id] = reminder.dict()
+        self._by_user.setdefault(reminder.user_id, set()).add(reminder.id)
+
+    async def insert_many(self, reminders: list[Reminder]) -> InsertResult:
+        saved, failed = [], []
+        for reminder in reminders:
+            try:
+                await self.insert(reminder)
+            except ValueError:
+                failed.append(reminder.id)
+                continue
+            saved.append(reminder.id)
+        return InsertResult(saved, failed)
+
+    def _pending_of(self, user_id: int) -> list[dict]:
+        docs = (self._docs[reminder_id] for reminder_id in self._by_user.get(user_id, ()))
+        return [doc for doc in docs if not doc["is_sent"]]
+
+    def _remove(self, doc: dict) -> None:
+        del self._docs[doc["id"]]
+        user_ids = self._by_user.get(doc["user_id"])
+        if user_ids is not None:
+            user_ids.discard(doc["id"])
+            if not user_ids:
+                del self._by_user[doc["user_id"]]
+
+    async def delete_pending(self, reminder_id: str, user_id: int) -> bool:
+        doc = self._docs.get(reminder_id)
+        if doc is None or doc["user_id"] != user_id or doc["is_sent"]:
+            return False
+        self._remove(doc)
+        return True
+
+    async def delete_user_pending(self, user_id: int) -> int:
+        pending = self._pending_of(user_id)
+        for doc in pending:
+            self._remove(doc)
+        return len(pending)
+
+    async def count_user_pending(self, user_id: int) -> int:
+        return len(self._pending_of(user_id))
+
+    async def list_user_pending(self, user_id: int, after: datetime, limit: int) -> list[dict]:
+        docs = sorted(
+            (doc for doc in self._pending_of(user_id) if doc["target_datetime"] > after),
+            key=lambda doc: doc["target_datetime"],
+        )
+        return [{field: doc.get(field) for field in LIST_FIELDS} for doc in docs[:limit]]
+
+    async def window(self, after: datetime | None, horizon: datetime, batch_size: int) -> AsyncIterator[dict]:
+        from Scheduler.entry import SCHEDULED_PROJECTION
+        docs = sorted(
+            (
+                doc for doc in self._docs.values()
+                if not doc["is_sent"] and doc["target_datetime"] <= horizon
+                and (after is None or doc["target_datetime"] > after)
+            ),
+            key=lambda doc: doc["target_datetime"],
+        )
+        fields = [field for field, include in SCHEDULED_PROJECTION.items() if include and field != '_id']
+        for doc in docs:
+            yield {field: doc.get(field) for field in fields}
+
+    async def apply_status_updates(self, updates: list[StatusUpdate]) -> None:
+        for update in updates:
+            doc = self._docs.get(update.reminder_id)
+            if doc is None:
+                continue
+            if isinstance(update, MarkSent):
+                if not doc["is_sent"]:
+                    doc.update(is_sent=True, sent_at=update.sent_at)
+            elif isinstance(update, MarkFailed):
+                doc.update(is_sent=True, sent_at=update.failed_at, error_on_send=update.error)
+            elif isinstance(update, MarkExpired):
+                if not doc["is_sent"]:
+                    doc.update(is_sent=True, sent_at=update.expired_at, expired=True)
+            elif not doc["is_sent"] and doc["target_datetime"] == update.occurrence:
+                doc.update(target_datetime=update.next_at, last_sent_at=update.sent_at, **update.lease)
+                doc["occurrences"] = doc.get("occurrences", 0) + 1
+
+    async def find_all(self) -> AsyncIterator[dict]:
+        for doc in list(self._docs.values()):
+            yield dict(doc)
+
+    async def clear(self) -> None:
+        self._docs.clear()
+        self._by_user.clear()
+
+
+__all__ = [
+    'ReminderRepository', 'MongoReminderRepository', 'MemoryReminderRepository',
+    'MarkSent', 'MarkFailed', 'MarkExpired', 'AdvanceRecurring', 'StatusUpdate', 'InsertResult',
+]
@@ -0,0 +1,168 @@
+# Библиотеки
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+from dotenv import load_dotenv
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from Database import connection
+from Database.models import Reminder
+
+load_dotenv('config.env')
+logger = logging.getLogger(__name__)
+
+# Хранение отправленных напоминаний:
+# off - не трогать, ttl - удалять TTL-индексом по sent_at, archive - переносить в архивную коллекцию
+RETENTION_MODE = os.getenv("RETENTION_MODE", "archive").lower()
+RETENTION_DAYS = int(os.getenv("RETENTION_DAYS", "7"))
+ARCHIVE_INTERVAL_MINUTES = int(os.getenv("ARCHIVE_INTERVAL_MINUTES", "60"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+# TTL задаётся на объявленном в модели индексе по sent_at: второй индекс с теми же ключами
+# и фильтром MongoDB отклоняет как эквивалентный (IndexOptionsConflict)
+TTL_INDEX_NAME = 'sent_by_time'
+DUPLICATE_KEY_ERROR = 11000
+
+
+async def ensure_ttl_index(db, retention: timedelta | None) -> None:
+    """
+    Включает (или перенастраивает) удаление отправленных напоминаний по индексу sent_by_time.
+    retention=None снимает TTL, если он остался от прежнего режима хранения.
+    Индекс создаётся в ensure_indexes, поэтому вызывается после него.
+    """
+    collection = db[Reminder.Collection.name]
+    existing = (await collection.index_information()).get(TTL_INDEX_NAME)
+    if existing is None:
+        logger.warning(f"Индекс {TTL_INDEX_NAME} не найден, TTL не настроен.")
+        return
+
+    if retention is None:
+        if 'expireAfterSeconds' not in existing:
+            return
+        # collMod не умеет убирать TTL, поэтому индекс пересоздаётся без него
+        spec = next(spec for spec in Reminder.Collection.indexes if spec['name'] == TTL_INDEX_NAME)
+        await collection.drop_index(TTL_INDEX_NAME)
+        await collection.create_index(spec['keys'], **{key: value for key, value in spec.items() if key != 'keys'})
+        logger.info(f"TTL снят с индекса {TTL_INDEX_NAME}: отправленные напоминания больше не удаляются по сроку.")
+        return
+
+    expire_after = int(retention.total_seconds())
+    if existing.get('expireAfterSeconds') != expire_after:
+        # collMod превращает обычный индекс в TTL (MongoDB 5.1+) или меняет срок у существующего
+        await db.command({
+            'collMod': Reminder.Collection.name,
+            'index': {'name': TTL_INDEX_NAME, 'expireAfterSeconds': expire_after},
+        })
+        logger.info(f"TTL-индекс {TTL_INDEX_NAME}: отправленные напоминания удаляются через {retention}.")
+
+
+class ReminderArchiver:
+    """
+    Фоновый перенос отправленных (и неудачных) напоминаний в архивную коллекцию пачками,
+    чтобы рабочая коллекция и её индексы оставались маленькими.
+    """
+
+    def __init__(
+        self,
+        retention: timedelta = timedelta(days=RETENTION_DAYS),
+        interval_minutes: int = ARCHIVE_INTERVAL_MINUTES,
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+    ):
+        self.retention = retention
+        self.interval = interval_minutes * 60
+        self.batch_size = batch_size
+        self._task: asyncio.Task | None = None
+
+    async def archive_once(self) -> int:
+        """Переносит все напоминания, отправленные раньше cutoff. Возвращает количество документов."""
+        db = connection.db
+        source = db[Reminder.Collection.name]
+        archive = db[Reminder.Collection.archive_name]
+        cutoff = datetime.now() - self.retention
+
+        started = time.perf_counter()
+        moved = 0
+        while True:
+            batch = await source.find(
+                {'is_sent': True, 'sent_at': {'$lt': cutoff}}
+            ).sort('sent_at', 1).limit(self.batch_size).to_list(length=self.batch_size)
+            if not batch:
+                break
+
+            try:
+                await archive.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Повторный перенос после сбоя: документ уже в архиве, это не ошибка
+                errors = e.details.get('writeErrors', [])
+                if any(error.get('code') != DUPLICATE_KEY_ERROR for error in errors):
+                    raise
+
+            result = await source.delete_many({'_id': {'$in': [doc['_id'] for doc in batch]}})
+            moved += result.deleted_count
+            if len(batch) < self.batch_size:
+                break
+
+        logger.info(f"Архивация: перенесено {moved} напоминаний за {time.perf_counter() - started:.2f} с.")
+        return moved
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.archive_once()
+            except Exception as e:
+                logger.error(f"Ошибка при архивации напоминаний: {e}")
+            await asyncio.sleep(self.interval)
+
+
+archiver: ReminderArchiver | None = None
+
+
+async def start_retention() -> None:
+    """Включает выбранный режим хранения отправленных напоминаний."""
+    global archiver
+    db = connection.db
+
+    if db is None:
+        # Хранилище в памяти: данные и так не переживают перезапуск
+        logger.info("Очистка отправленных напоминаний работает только с MongoDB, пропускаем.")
+        return
+
+    try:
+        # В остальных режимах TTL, оставшийся от режима ttl, снимается
+        await ensure_ttl_index(db, timedelta(days=RETENTION_DAYS) if RETENTION_MODE == 'ttl' else None)
+    except OperationFailure as e:
+        logger.error(f"Не удалось настроить TTL-индекс: {e}")
+
+    if RETENTION_MODE == 'archive':
+        archiver = ReminderArchiver()
+        archiver.start()
+        logger.info(f"Архивация отправленных напоминаний старше {RETENTION_DAYS} дн. включена.")
+    elif RETENTION_MODE != 'ttl':
+        logger.info("Очистка отправленных напоминаний отключена.")
+
+
+async def stop_retention() -> None:
+    global archiver
+    if archiver is not None:
+        await archiver.stop()
+        archiver = None
+
+
+__all__ = ['ReminderArchiver', 'ensure_ttl_index', 'start_retention', 'stop_retention']
@@ -0,0 +1,116 @@
+# Библиотеки
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Callable
+
+from dotenv import load_dotenv
+
+from Scheduler.entry import ScheduledReminder, DigestReminder
+
+load_dotenv('config.env')
+logger = logging.getLogger(__name__)
+
+# Что делать с напоминаниями, просроченными больше чем на OVERDUE_THRESHOLD_MINUTES:
+# deliver - доставить как обычно, digest - всегда включать в сводку, expire - не отправлять
+OVERDUE_POLICY = os.getenv("OVERDUE_POLICY", "digest").lower()
+OVERDUE_THRESHOLD_MINUTES = int(os.getenv("OVERDUE_THRESHOLD_MINUTES", "60"))
+# За сколько секунд растянуть отправку просроченных напоминаний
+CATCHUP_RAMP_SECONDS = float(os.getenv("CATCHUP_RAMP_SECONDS", "60"))
+# Со скольких просроченных напоминаний в одном чате они объединяются в сводку
+CATCHUP_DIGEST_MIN = int(os.getenv("CATCHUP_DIGEST_MIN", "2"))
+
+POLICIES = ("deliver", "digest", "expire")
+
+
+class CatchUpPlanner:
+    """
+    Догоняющий режим для просроченных напоминаний (например, после простоя бота).
+    Вместо немедленной отправки каждого из них напоминания копятся во время загрузки окна,
+    группируются по (chat_id, user_id) в сводки и равномерно распределяются по CATCHUP_RAMP_SECONDS.
+    """
+
+    def __init__(
+        self,
+        schedule: Callable[[ScheduledReminder], None],
+        expire: Callable[[ScheduledReminder], None],
+        policy: str = OVERDUE_POLICY,
+        threshold: timedelta = timedelta(minutes=OVERDUE_THRESHOLD_MINUTES),
+        ramp_seconds: float = CATCHUP_RAMP_SECONDS,
+        digest_min: int = CATCHUP_DIGEST_MIN,
+    ):
+        if policy not in POLICIES:
+            logger.warning(f"Неизвестная политика OVERDUE_POLICY={policy!r}, используется digest.")
+            policy = "digest"
+        self._schedule = schedule
+        self._expire = expire
+        self.policy = policy
+        self.threshold = threshold
+        self.ramp_seconds = ramp_seconds
+        self.digest_min = digest_min
+        self._overdue: list[ScheduledReminder] = []
+
+    def __len__(self) -> int:
+        return len(self._overdue)
+
+    def add(self, reminder: ScheduledReminder) -> None:
+        self._overdue.append(reminder)
+
+    def discard(self, reminder_id: str) -> None:
+        """Убирает отменённое напоминание, ещё не разложенное по сводкам."""
+        self._overdue = [reminder for reminder in self._overdue if reminder.id != reminder_id]
+
+    def discard_user(self, user_id: int) -> None:
+        """Убирает все накопленные напоминания пользователя (/cancel_reminders)."""
+        self._overdue = [reminder for reminder in self._overdue if reminder.user_id != user_id]
+
+    def flush(self) -> None:
+        """Раскладывает накопленные просроченные напоминания: сводки, отдельные отправки, истёкшие."""
+        if not self._overdue:
+            return
+        overdue, self._overdue = self._overdue, []
+        now = datetime.now()
+
+        # Сводка принадлежит одному пользователю: в групповом чате его отмена не трогает чужие напоминания
+        by_chat: dict[tuple[int, int], list[ScheduledReminder]] = defaultdict(list)
+        force_digest: set[tuple[int, int]] = set()
+        expired = 0
+        for reminder in overdue:
+            stale = now - reminder.target_datetime > self.threshold
+            if stale and self.policy == "expire":
+                self._expire(reminder)
+                expired += 1
+                continue
+            key = (reminder.chat_id, reminder.user_id)
+            if stale and self.policy == "digest":
+                force_digest.add(key)
+            by_chat[key].append(reminder)
+
+        messages: list[tuple[tuple[int, int], list[ScheduledReminder]]] = []
+        for key, reminders in by_chat.items():
+            if len(reminders) >= self.digest_min or key in force_digest:
+                # Длинная сводка не пройдёт лимит длины сообщения Telegram - делим её на несколько
+                reminders.sort(key=lambda reminder: reminder.target_datetime)
+                messages.extend((key, chunk) for chunk in DigestReminder.split(reminders))
+            else:
+                messages.extend((key, [reminder]) for reminder in reminders)
+
+        # Равномерно растягиваем отправку, чтобы не устроить лавину запросов при старте
+        step = self.ramp_seconds / len(messages) if messages else 0
+        digests = 0
+        for index, (key, reminders) in enumerate(messages):
+            send_at = now + timedelta(seconds=index * step)
+            if len(reminders) == 1 and key not in force_digest:
+                self._schedule(reminders[0].rescheduled(send_at))
+            else:
+                self._schedule(DigestReminder(reminders, send_at))
+                digests += 1
+
+        logger.info(
+            f"Догоняющий режим: {len(overdue)} просроченных напоминаний, {digests} сводок, "
+            f"{len(messages) - digests} отдельных отправок за {self.ramp_seconds:.0f} с, {expired} истекло."
+        )
+
+
+__all__ = ['CatchUpPlanner']
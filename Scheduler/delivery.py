@@ -0,0 +1,198 @@
+# Библиотеки
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from cachetools import TTLCache
+from dotenv import load_dotenv
+
+from Scheduler.entry import ScheduledReminder
+from metrics import REMINDER_SENDS
+
+load_dotenv('config.env')
+logger = logging.getLogger(__name__)
+
+# Лимиты Telegram: ~30 сообщений в секунду всего и ~1 сообщение в секунду в один чат
+DELIVERY_GLOBAL_RATE = float(os.getenv("DELIVERY_GLOBAL_RATE", "30"))
+DELIVERY_CHAT_RATE = float(os.getenv("DELIVERY_CHAT_RATE", "1"))
+DELIVERY_WORKERS = int(os.getenv("DELIVERY_WORKERS", "8"))
+DELIVERY_MAX_ATTEMPTS = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "5"))
+DELIVERY_BACKOFF_SECONDS = float(os.getenv("DELIVERY_BACKOFF_SECONDS", "1"))
+
+# Ошибки, при которых повторная отправка бессмысленна
+PERMANENT_ERRORS = (TelegramBadRequest, TelegramForbiddenError)
+
+
+class TokenBucket:
+    """Простой token bucket: rate токенов в секунду, не более capacity в запасе."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> bool:
+        """Неблокирующий вариант acquire: забирает токен, только если он есть."""
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        # Lock выстраивает ожидающих в очередь FIFO
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class DeliveryQueue:
+    """
+    Очередь исходящих напоминаний.
+    Воркеры отправляют сообщения с учётом глобального и per-chat лимитов,
+    соблюдают TelegramRetryAfter и повторяют временные ошибки с экспоненциальной задержкой.
+    У каждого чата своя очередь, а в общую очередь чат попадает, только когда ему можно
+    отправлять: воркеры не ждут занятый чат и тем временем обслуживают остальные.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[ScheduledReminder], Awaitable[None]],
+        on_sent: Callable[[ScheduledReminder], None],
+        on_failed: Callable[[ScheduledReminder, Exception], None],
+        is_active: Callable[[ScheduledReminder], bool] = lambda reminder: True,
+        workers: int = DELIVERY_WORKERS,
+        global_rate: float = DELIVERY_GLOBAL_RATE,
+        chat_rate: float = DELIVERY_CHAT_RATE,
+        max_attempts: int = DELIVERY_MAX_ATTEMPTS,
+        backoff: float = DELIVERY_BACKOFF_SECONDS,
+    ):
+        self._send = send
+        self._on_sent = on_sent
+        self._on_failed = on_failed
+        self._is_active = is_active
+        self.workers = workers
+        self.chat_rate = chat_rate
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        # Чаты, которым уже можно отправлять; в очереди каждый чат не больше одного раза
+        self._ready: asyncio.Queue[int] = asyncio.Queue()
+        # Ожидающие отправки (напоминание, попытка) по чатам; чат есть здесь, пока у него есть работа
+        self._chats: dict[int, deque[tuple[ScheduledReminder, int]]] = {}
+        self._size = 0
+        self._global_bucket = TokenBucket(global_rate)
+        # Когда чату снова можно отправлять; неактивные чаты вытесняются автоматически
+        self._chat_ready_at: TTLCache = TTLCache(maxsize=100_000, ttl=max(60, 2 / chat_rate))
+        self._paused_until = 0.0 # Глобальная пауза после 429
+        self._tasks: list[asyncio.Task] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    def put(self, reminder: ScheduledReminder, attempt: int = 1) -> None:
+        self._size += 1
+        pending = self._chats.get(reminder.chat_id)
+        if pending is not None:
+            # Чат уже в работе: напоминание отправится после предыдущих
+            pending.append((reminder, attempt))
+            return
+        self._chats[reminder.chat_id] = deque([(reminder, attempt)])
+        self._wake(reminder.chat_id)
+
+    def _wake(self, chat_id: int) -> None:
+        """Ставит чат в общую очередь, как только ему снова можно отправлять."""
+        delay = self._chat_ready_at.get(chat_id, 0) - time.monotonic()
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._ready.put_nowait, chat_id)
+        else:
+            self._ready.put_nowait(chat_id)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        logger.info(f"Очередь доставки запущена с {self.workers} воркерами.")
+
+    async def stop(self) -> None:
+        """Останавливает воркеров. Неотправленные напоминания останутся is_sent=False в БД."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._size:
+            logger.warning(f"Очередь доставки остановлена, не отправлено {self._size} напоминаний.")
+
+    def _retry_later(self, reminder: ScheduledReminder, attempt: int, delay: float) -> None:
+        REMINDER_SENDS.inc("retry")
+        asyncio.get_running_loop().call_later(delay, self.put, reminder, attempt + 1)
+
+    async def _worker(self) -> None:
+        while True:
+            chat_id = await self._ready.get()
+            pending = self._chats[chat_id]
+            reminder, attempt = pending.popleft()
+            self._size -= 1
+            try:
+                await self._deliver(reminder, attempt)
+            except Exception as e:
+                logger.error(f"Неожиданная ошибка в очереди доставки для {reminder.id}: {e}")
+            finally:
+                if pending:
+                    self._wake(chat_id)
+                else:
+                    del self._chats[chat_id]
+
+    async def _deliver(self, reminder: ScheduledReminder, attempt: int) -> None:
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        await self._global_bucket.acquire()
+
+        # Напоминание могли отменить, пока оно ждало в очереди или между попытками
+        if not self._is_active(reminder):
+            logger.debug("Напоминание %s отменено до отправки.", reminder.id)
+            return
+
+        # Интервал чата отсчитывается от фактической отправки
+        self._chat_ready_at[reminder.chat_id] = time.monotonic() + 1 / self.chat_rate
+        try:
+            await self._send(reminder)
+        except TelegramRetryAfter as e:
+            logger.warning("Telegram просит подождать %s с перед отправкой %s.", e.retry_after, reminder.id)
+            self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+            if attempt >= self.max_attempts:
+                self._on_failed(reminder, e)
+                return
+            self._retry_later(reminder, attempt, e.retry_after)
+            return
+        except PERMANENT_ERRORS as e:
+            self._on_failed(reminder, e)
+            return
+        except Exception as e:
+            if attempt >= self.max_attempts:
+                self._on_failed(reminder, e)
+                return
+            delay = self.backoff * 2 ** (attempt - 1)
+            logger.warning("Ошибка отправки %s (попытка %s/%s): %s. Повтор через %s с.", reminder.id, attempt, self.max_attempts, e, delay)
+            self._retry_later(reminder, attempt, delay)
+            return
+
+        self._on_sent(reminder)
+
+
+__all__ = ['TokenBucket', 'DeliveryQueue', 'PERMANENT_ERRORS']
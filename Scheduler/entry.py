@@ -0,0 +1,148 @@
+# Библиотеки
+from datetime import datetime
+
+from Database.models import Reminder
+
+# Поля документа, которые нужны планировщику (используется как projection при загрузке)
+SCHEDULED_FIELDS = ('id', 'user_id', 'chat_id', 'reminder_text', 'target_datetime')
+SCHEDULED_PROJECTION = {'_id': 0, **{field: 1 for field in SCHEDULED_FIELDS}, 'recurrence': 1}
+
+# Лимит Telegram на длину сообщения (в UTF-16 символах) и заголовок сводки (см. send_digest)
+MESSAGE_MAX_LENGTH = 4096
+DIGEST_HEADER = "⏰ Пропущенные напоминания:\n"
+
+
+def telegram_length(text: str) -> int:
+    """Длина текста так, как её считает Telegram: символы вне BMP (эмодзи) занимают два."""
+    return len(text.encode('utf-16-le')) // 2
+
+
+DIGEST_TEXT_LIMIT = MESSAGE_MAX_LENGTH - telegram_length(DIGEST_HEADER)
+
+
+class ScheduledReminder:
+    """
+    Компактное представление напоминания в планировщике.
+    Валидация pydantic выполняется только на входе от пользователя (Reminder),
+    а документы из БД превращаются в эти объекты без неё.
+    """
+
+    __slots__ = SCHEDULED_FIELDS
+
+    def __init__(self, id: str, user_id: int, chat_id: int, reminder_text: str, target_datetime: datetime):
+        self.id = id
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.reminder_text = reminder_text
+        self.target_datetime = target_datetime
+
+    @classmethod
+    def from_doc(cls, doc: dict) -> 'ScheduledReminder':
+        """Быстрое создание из сырого документа MongoDB. KeyError/TypeError для битых документов."""
+        target_datetime = doc['target_datetime']
+        # Время участвует в сравнениях кучи, поэтому его тип проверяем всегда
+        if not isinstance(target_datetime, datetime):
+            raise TypeError(f"target_datetime должен быть datetime, получено {type(target_datetime).__name__}")
+        recurrence = doc.get('recurrence')
+        if recurrence is not None:
+            return RecurringReminder(doc['id'], doc['user_id'], doc['chat_id'], doc['reminder_text'], target_datetime, recurrence)
+        return cls(doc['id'], doc['user_id'], doc['chat_id'], doc['reminder_text'], target_datetime)
+
+    @classmethod
+    def from_reminder(cls, reminder: Reminder) -> 'ScheduledReminder':
+        if reminder.recurrence is not None:
+            return RecurringReminder(
+                reminder.id, reminder.user_id, reminder.chat_id, reminder.reminder_text,
+                reminder.target_datetime, reminder.recurrence,
+            )
+        return cls(reminder.id, reminder.user_id, reminder.chat_id, reminder.reminder_text, reminder.target_datetime)
+
+    def rescheduled(self, target_datetime: datetime) -> 'ScheduledReminder':
+        """Копия напоминания с другим временем отправки (например, в догоняющем режиме)."""
+        return ScheduledReminder(self.id, self.user_id, self.chat_id, self.reminder_text, target_datetime)
+
+    def __repr__(self) -> str:
+        return f"ScheduledReminder(id={self.id!r}, user_id={self.user_id}, target_datetime={self.target_datetime})"
+
+
+class RecurringReminder(ScheduledReminder):
+    """
+    Очередное срабатывание повторяющегося напоминания.
+    В планировщике находится только ближайшее срабатывание; occurrence - его срок в БД,
+    по нему после отправки правило атомарно сдвигается на следующее.
+    """
+
+    __slots__ = ('recurrence', 'occurrence')
+
+    def __init__(
+        self, id: str, user_id: int, chat_id: int, reminder_text: str, target_datetime: datetime,
+        recurrence: dict, occurrence: datetime | None = None,
+    ):
+        super().__init__(id, user_id, chat_id, reminder_text, target_datetime)
+        self.recurrence = recurrence
+        self.occurrence = occurrence or target_datetime
+
+    def rescheduled(self, target_datetime: datetime) -> 'RecurringReminder':
+        return RecurringReminder(
+            self.id, self.user_id, self.chat_id, self.reminder_text, target_datetime, self.recurrence, self.occurrence,
+        )
+
+    def advanced(self, next_at: datetime) -> 'RecurringReminder':
+        """Следующее срабатывание того же правила."""
+        return RecurringReminder(self.id, self.user_id, self.chat_id, self.reminder_text, next_at, self.recurrence)
+
+
+class DigestReminder(ScheduledReminder):
+    """
+    Сводное сообщение о нескольких просроченных напоминаниях одного пользователя в чате.
+    Текст сводки не длиннее DIGEST_TEXT_LIMIT: длинные списки заранее делятся через split().
+    """
+
+    __slots__ = ('reminders',)
+
+    def __init__(self, reminders: list[ScheduledReminder], target_datetime: datetime):
+        first = reminders[0]
+        super().__init__(f"digest:{first.id}", first.user_id, first.chat_id, "", target_datetime)
+        self.reminders = reminders
+        self._render()
+
+    @staticmethod
+    def line(reminder: ScheduledReminder) -> str:
+        """Строка сводки; слишком длинный текст обрезается, чтобы строка поместилась в сообщение."""
+        line = f"• {reminder.target_datetime.strftime('%H:%M %d.%m')} — {reminder.reminder_text}"
+        if telegram_length(line) <= DIGEST_TEXT_LIMIT:
+            return line
+        # Режем по UTF-16, половинка суррогатной пары отбрасывается при декодировании
+        cut = line.encode('utf-16-le')[:2 * (DIGEST_TEXT_LIMIT - 1)]
+        return cut.decode('utf-16-le', errors='ignore') + "…"
+
+    @classmethod
+    def split(cls, reminders: list[ScheduledReminder], limit: int = DIGEST_TEXT_LIMIT) -> list[list[ScheduledReminder]]:
+        """Делит напоминания на части, текст каждой из которых помещается в одно сообщение."""
+        chunks: list[list[ScheduledReminder]] = []
+        chunk: list[ScheduledReminder] = []
+        length = 0
+        for reminder in reminders:
+            size = telegram_length(cls.line(reminder))
+            if chunk and length + 1 + size > limit:
+                chunks.append(chunk)
+                chunk, length = [], 0
+            length += size + (1 if chunk else 0) # +1 - перевод строки
+            chunk.append(reminder)
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def discard(self, reminder_id: str) -> None:
+        """Убирает отменённое напоминание из сводки (в том числе уже ждущей доставки); текст только укорачивается."""
+        self.reminders = [reminder for reminder in self.reminders if reminder.id != reminder_id]
+        self._render()
+
+    def _render(self) -> None:
+        self.reminder_text = "\n".join(self.line(reminder) for reminder in self.reminders)
+
+
+__all__ = [
+    'ScheduledReminder', 'RecurringReminder', 'DigestReminder', 'SCHEDULED_PROJECTION',
+    'MESSAGE_MAX_LENGTH', 'DIGEST_HEADER', 'telegram_length',
+]
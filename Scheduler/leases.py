@@ -0,0 +1,150 @@
+# Библиотеки
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import AsyncIterator
+
+from dotenv import load_dotenv
+from pymongo import ReturnDocument
+
+from Database import connection
+from Scheduler.entry import SCHEDULED_PROJECTION
+
+load_dotenv('config.env')
+logger = logging.getLogger(__name__)
+
+# Настройки аренды напоминаний между несколькими процессами
+LEASES_ENABLED = os.getenv("REMINDER_LEASES_ENABLED", "false").lower() in ("1", "true", "yes")
+LEASE_SECONDS = int(os.getenv("REMINDER_LEASE_SECONDS", "300"))
+WORKER_ID = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseManager:
+    """
+    Аренда напоминаний на коллекции reminders.
+    Процесс атомарно захватывает документ (lease_owner + lease_expires_at),
+    периодически продлевает свои аренды, а просроченные аренды упавших
+    процессов может забрать любой другой воркер.
+    """
+
+    def __init__(
+        self,
+        worker_id: str = WORKER_ID,
+        lease_duration: timedelta = timedelta(seconds=LEASE_SECONDS),
+        collection_name: str = 'reminders',
+    ):
+        self.worker_id = worker_id
+        self.lease_duration = lease_duration
+        self.collection_name = collection_name
+        self._task: asyncio.Task | None = None
+
+    def new_lease(self) -> dict:
+        """Поля аренды для документа, который этот процесс планирует сам."""
+        return {"lease_owner": self.worker_id, "lease_expires_at": datetime.now() + self.lease_duration}
+
+    def _collection(self):
+        if connection.db is None:
+            raise RuntimeError("Аренда напоминаний работает только с MongoDB: подключение не выполнено.")
+        return connection.db[self.collection_name]
+
+    async def claim_window(self, horizon: datetime) -> AsyncIterator[dict]:
+        """Захватывает по одному свободные или просроченные напоминания со сроком до horizon."""
+        collection = self._collection()
+
+        while True:
+            now = datetime.now()
+            reminder_doc = await collection.find_one_and_update(
+                {
+                    "is_sent": False,
+                    "target_datetime": {"$lte": horizon},
+                    "$or": [
+                        {"lease_owner": None},
+                        {"lease_expires_at": {"$lt": now}},
+                    ],
+                },
+                {"$set": {"lease_owner": self.worker_id, "lease_expires_at": now + self.lease_duration}},
+                sort=[("target_datetime", 1)],
+                projection=SCHEDULED_PROJECTION,
+                return_document=ReturnDocument.AFTER,
+            )
+            if reminder_doc is None:
+                return
+            yield reminder_doc
+
+    async def claim(self, reminder_id: str) -> dict | None:
+        """Захватывает конкретное напоминание, если оно свободно или его аренда истекла."""
+        now = datetime.now()
+        return await self._collection().find_one_and_update(
+            {
+                "id": reminder_id,
+                "is_sent": False,
+                "$or": [
+                    {"lease_owner": None},
+                    {"lease_expires_at": {"$lt": now}},
+                ],
+            },
+            {"$set": {"lease_owner": self.worker_id, "lease_expires_at": now + self.lease_duration}},
+            projection=SCHEDULED_PROJECTION,
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def release(self, reminder_id: str) -> bool:
+        """Отдаёт аренду одного напоминания, например когда его перенесли за пределы окна."""
+        result = await self._collection().update_one(
+            {"id": reminder_id, "lease_owner": self.worker_id, "is_sent": False},
+            {"$set": {"lease_owner": None, "lease_expires_at": None}},
+        )
+        return result.modified_count > 0
+
+    async def renew(self) -> int:
+        """Продлевает все аренды этого процесса."""
+        result = await self._collection().update_many(
+            {"lease_owner": self.worker_id, "is_sent": False},
+            {"$set": {"lease_expires_at": datetime.now() + self.lease_duration}},
+        )
+        logger.debug(f"Продлено {result.modified_count} аренд воркера {self.worker_id}.")
+        return result.modified_count
+
+    async def release_all(self) -> int:
+        """Освобождает аренды при штатной остановке, чтобы другие воркеры забрали их сразу."""
+        if connection.db is None:
+            return 0
+        result = await self._collection().update_many(
+            {"lease_owner": self.worker_id, "is_sent": False},
+            {"$set": {"lease_owner": None, "lease_expires_at": None}},
+        )
+        logger.info(f"Освобождено {result.modified_count} аренд воркера {self.worker_id}.")
+        return result.modified_count
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._renew_loop())
+            logger.info(f"Аренда напоминаний включена, воркер {self.worker_id}.")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.release_all()
+        except Exception as e:
+            logger.error(f"Ошибка при освобождении аренд: {e}")
+
+    async def _renew_loop(self) -> None:
+        # Продлеваем с запасом: трижды за время аренды
+        interval = self.lease_duration.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.renew()
+            except Exception as e:
+                logger.error(f"Ошибка при продлении аренд: {e}")
+
+
+__all__ = ['LeaseManager', 'LEASES_ENABLED', 'WORKER_ID']
@@ -0,0 +1,144 @@
+# Библиотеки
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from dotenv import load_dotenv
+
+from Database import connection
+from Scheduler.entry import ScheduledReminder
+from Scheduler.leases import LeaseManager
+
+load_dotenv('config.env')
+logger = logging.getLogger(__name__)
+
+# Настройки окна предзагрузки
+LOOKAHEAD_MINUTES = int(os.getenv("REMINDER_LOOKAHEAD_MINUTES", "120"))
+REFILL_INTERVAL_SECONDS = int(os.getenv("REMINDER_REFILL_INTERVAL_SECONDS", "600"))
+LOAD_BATCH_SIZE = int(os.getenv("REMINDER_LOAD_BATCH_SIZE", "500"))
+
+
+class PendingReminderLoader:
+    """
+    Потоковая загрузка неотправленных напоминаний.
+    В память попадают только напоминания, срок которых наступает в пределах окна
+    lookahead; окно периодически сдвигается вперёд дозагрузкой из MongoDB.
+    """
+
+    def __init__(
+        self,
+        schedule: Callable[[ScheduledReminder], Awaitable[None]],
+        lookahead: timedelta = timedelta(minutes=LOOKAHEAD_MINUTES),
+        refill_interval: float = REFILL_INTERVAL_SECONDS,
+        batch_size: int = LOAD_BATCH_SIZE,
+        leases: LeaseManager | None = None,
+        after_load: Callable[[], None] | None = None,
+        before_load: Callable[[], Awaitable[bool]] | None = None,
+    ):
+        self._schedule = schedule
+        self.lookahead = lookahead
+        self.refill_interval = refill_interval
+        self.batch_size = batch_size
+        self.leases = leases
+        self._after_load = after_load # Вызывается после каждой загрузки окна
+        self._before_load = before_load # Готовит БД к загрузке; False - загрузку отложить
+        self.horizon: datetime | None = None # Граница уже загруженного окна
+        self.loading_horizon: datetime | None = None # Граница окна, которое загружается прямо сейчас
+        # Отменённые во время текущей загрузки: курсор мог прочитать их документы до удаления
+        self._cancelled_ids: set[str] = set()
+        self._cancelled_users: set[int] = set()
+        self._task: asyncio.Task | None = None
+
+    def covers(self, target_datetime: datetime) -> bool:
+        """True, если напоминание попадает в уже загруженное окно и его нужно планировать сразу."""
+        # Во время загрузки курсор может не увидеть только что созданное напоминание,
+        # поэтому его планируют сразу; повторное планирование того же id безвредно
+        horizon = self.loading_horizon or self.horizon
+        return horizon is not None and target_datetime <= horizon
+
+    def discard(self, reminder_id: str) -> None:
+        """Не планировать напоминание, если текущая загрузка уже прочитала его документ из БД."""
+        if self.loading_horizon is not None:
+            self._cancelled_ids.add(reminder_id)
+
+    def discard_user(self, user_id: int) -> None:
+        """То же для всех напоминаний пользователя (/cancel_reminders)."""
+        if self.loading_horizon is not None:
+            self._cancelled_users.add(user_id)
+
+    async def load_window(self) -> int:
+        """Загружает напоминания от текущей границы окна до now + lookahead."""
+        if connection.reminders is None:
+            logger.critical("Хранилище напоминаний не инициализировано! Подключение к БД не выполнено?")
+            return 0
+
+        new_horizon = datetime.now() + self.lookahead
+
+        loaded = 0
+        self.loading_horizon = new_horizon
+        try:
+            # Вызывается уже с loading_horizon: всё, что изменится после, covers() отнесёт к окну
+            if self._before_load is not None and not await self._before_load():
+                logger.warning("Загрузка окна отложена: не удалось записать отложенные изменения в БД.")
+                return 0
+            async for reminder_doc in self._window_docs(new_horizon):
+                try:
+                    # Документы уже прошли валидацию при создании, поэтому собираем их без pydantic
+                    reminder = ScheduledReminder.from_doc(reminder_doc)
+                except (KeyError, TypeError) as e:
+                    logger.error(f"Повреждённый документ напоминания в БД: {reminder_doc}. Ошибка: {e}")
+                    continue
+                if reminder.id in self._cancelled_ids or reminder.user_id in self._cancelled_users:
+                    continue # Удалён из БД, пока документ ждал в пачке курсора
+                await self._schedule(reminder)
+                loaded += 1
+        finally:
+            self.loading_horizon = None
+            self._cancelled_ids.clear()
+            self._cancelled_users.clear()
+
+        self.horizon = new_horizon
+        if self._after_load is not None:
+            self._after_load()
+        logger.info(f"Загружено {loaded} напоминаний до {new_horizon.strftime('%Y-%m-%d %H:%M:%S')}.")
+        return loaded
+
+    def _window_docs(self, new_horizon: datetime):
+        if self.leases is not None:
+            # Всё окно целиком: так подхватываются и просроченные аренды других воркеров
+            return self.leases.claim_window(new_horizon)
+        return connection.reminders.window(self.horizon, new_horizon, self.batch_size)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refill_loop())
+        if self.leases is not None:
+            self.leases.start()
+
+    async def stop(self) -> None:
+        """Останавливает дозагрузку. Аренды освобождаются отдельно, через release_leases."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def release_leases(self) -> None:
+        if self.leases is not None:
+            await self.leases.stop()
+
+    async def _refill_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refill_interval)
+            try:
+                await self.load_window()
+            except Exception as e:
+                logger.error(f"Ошибка при дозагрузке окна напоминаний: {e}")
+
+
+__all__ = ['PendingReminderLoader']
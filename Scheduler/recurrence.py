@@ -0,0 +1,76 @@
+# Библиотеки
+from datetime import datetime, time, timedelta
+
+# Правило повторения хранится в документе напоминания (поле recurrence) в одном из видов:
+# {"every": 7200}                        - каждые N секунд от предыдущего срабатывания
+# {"at": "09:00"}                        - каждый день в указанное время
+# {"at": "09:00", "weekdays": [0, 4]}    - в указанные дни недели (0 - понедельник)
+
+# Чаще раза в минуту повторять не даём
+MIN_INTERVAL_SECONDS = 60
+# И реже раза в год: огромные интервалы не помещаются в datetime
+MAX_INTERVAL_SECONDS = 366 * 24 * 3600
+
+
+def validate_rule(rule: dict) -> dict:
+    """Проверяет правило повторения. ValueError для некорректных правил."""
+    if "every" in rule:
+        if int(rule["every"]) < MIN_INTERVAL_SECONDS:
+            raise ValueError(f"Интервал повторения меньше {MIN_INTERVAL_SECONDS} с")
+        if int(rule["every"]) > MAX_INTERVAL_SECONDS:
+            raise ValueError(f"Интервал повторения больше {MAX_INTERVAL_SECONDS} с")
+        return {"every": int(rule["every"])}
+    if "at" in rule:
+        hour, minute = map(int, rule["at"].split(":"))
+        time(hour, minute)
+        weekdays = rule.get("weekdays")
+        if weekdays is not None:
+            weekdays = sorted(set(weekdays))
+            if not weekdays or not all(0 <= day <= 6 for day in weekdays):
+                raise ValueError(f"Некорректные дни недели: {rule['weekdays']}")
+            if len(weekdays) == 7:
+                weekdays = None
+        return {"at": f"{hour:02d}:{minute:02d}", **({"weekdays": weekdays} if weekdays else {})}
+    raise ValueError(f"Неизвестное правило повторения: {rule}")
+
+
+def next_occurrence(rule: dict, previous: datetime, after: datetime) -> datetime:
+    """
+    Следующее срабатывание правила строго позже after.
+    previous - срок предыдущего срабатывания: интервальные правила сохраняют от него фазу,
+    поэтому пропущенные за время простоя срабатывания не догоняются по одному.
+    """
+    if "every" in rule:
+        step = timedelta(seconds=rule["every"])
+        if previous > after:
+            return previous
+        return previous + step * ((after - previous) // step + 1)
+
+    clock = time(*map(int, rule["at"].split(":")))
+    weekdays = rule.get("weekdays")
+    day = after.date()
+    # Не больше недели вперёд: хотя бы один день недели в правиле есть
+    for _ in range(8):
+        candidate = datetime.combine(day, clock)
+        if candidate > after and (weekdays is None or candidate.weekday() in weekdays):
+            return candidate
+        day += timedelta(days=1)
+    raise ValueError(f"Не удалось вычислить следующее срабатывание для {rule}")
+
+
+def describe_rule(rule: dict) -> str:
+    """Человекочитаемое описание правила для ответов бота."""
+    if "every" in rule:
+        seconds = rule["every"]
+        for unit, name in ((604800, "нед."), (86400, "дн."), (3600, "ч"), (60, "мин")):
+            if seconds % unit == 0:
+                return f"каждые {seconds // unit} {name}"
+        return f"каждые {seconds} с"
+    weekdays = rule.get("weekdays")
+    if weekdays is None:
+        return f"каждый день в {rule['at']}"
+    names = ("пн", "вт", "ср", "чт", "пт", "сб", "вс")
+    return f"по {', '.join(names[day] for day in weekdays)} в {rule['at']}"
+
+
+__all__ = ['validate_rule', 'next_occurrence', 'describe_rule', 'MIN_INTERVAL_SECONDS', 'MAX_INTERVAL_SECONDS']
@@ -0,0 +1,217 @@
+# Библиотеки
+import asyncio
+import heapq
+import itertools
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from Scheduler.entry import ScheduledReminder, DigestReminder
+
+logger = logging.getLogger(__name__)
+
+# Элемент кучи: [target_datetime, порядковый номер, напоминание или None, если отменено]
+_TIME, _SEQ, _REMINDER = 0, 1, 2
+
+
+class ReminderScheduler:
+    """
+    Единый планировщик напоминаний.
+    Все ожидающие напоминания хранятся в min-heap по target_datetime,
+    а одна фоновая задача спит до ближайшего из них.
+    Индекс по user_id охватывает и ожидающие, и уже сработавшие, но ещё не
+    доставленные напоминания, чтобы отмена освобождала их за O(k).
+    Напоминания внутри сводок догоняющего режима индексируются отдельно: их отмена
+    убирает строку из сводки, а is_active не даёт запланировать их второй раз.
+    """
+
+    def __init__(self, callback: Callable[[ScheduledReminder], Awaitable[None]]):
+        self._callback = callback
+        self._heap: list[list] = []
+        self._entries: dict[str, list] = {} # id напоминания -> элемент кучи
+        self._inflight: dict[str, ScheduledReminder] = {} # Сработавшие, но ещё не доставленные
+        self._by_user: dict[int, set[str]] = {} # user_id -> id его живых напоминаний
+        self._digest_of: dict[str, str] = {} # id напоминания из сводки -> id сводки
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, reminder_id: str) -> bool:
+        return reminder_id in self._entries
+
+    def is_active(self, reminder_id: str) -> bool:
+        """True, если напоминание ещё не отменено (ожидает или доставляется)."""
+        return reminder_id in self._entries or reminder_id in self._inflight or reminder_id in self._digest_of
+
+    def user_reminder_ids(self, user_id: int) -> set[str]:
+        return set(self._by_user.get(user_id, ()))
+
+    def schedule(self, reminder: ScheduledReminder) -> None:
+        """Добавляет (или переназначает) напоминание. O(log n)."""
+        if reminder.id in self._inflight:
+            return # Уже доставляется
+        if reminder.id in self._entries:
+            self.cancel(reminder.id)
+
+        entry = self._push(reminder)
+
+        # Будим цикл только если новое напоминание стало ближайшим
+        if self._heap[0] is entry:
+            self._wakeup.set()
+
+    def schedule_many(self, reminders: list[ScheduledReminder]) -> None:
+        """Добавляет пачку напоминаний; цикл будится не больше одного раза."""
+        earliest = self._heap[0] if self._heap else None
+        for reminder in reminders:
+            if reminder.id in self._inflight:
+                continue
+            if reminder.id in self._entries:
+                self.cancel(reminder.id)
+            self._push(reminder)
+
+        if self._heap and self._heap[0] is not earliest:
+            self._wakeup.set()
+
+    def _push(self, reminder: ScheduledReminder) -> list:
+        entry = [reminder.target_datetime, next(self._counter), reminder]
+        self._entries[reminder.id] = entry
+        self._by_user.setdefault(reminder.user_id, set()).add(reminder.id)
+        if isinstance(reminder, DigestReminder):
+            for member in reminder.reminders:
+                self._digest_of[member.id] = reminder.id
+        heapq.heappush(self._heap, entry)
+        return entry
+
+    def _get(self, reminder_id: str) -> ScheduledReminder | None:
+        entry = self._entries.get(reminder_id)
+        if entry is not None:
+            return entry[_REMINDER]
+        return self._inflight.get(reminder_id)
+
+    def cancel(self, reminder_id: str) -> bool:
+        """
+        Отменяет напоминание. Элемент кучи помечается удалённым и выбрасывается при извлечении;
+        уже сработавшее напоминание не будет отправлено, т.к. доставка проверяет is_active.
+        """
+        entry = self._entries.pop(reminder_id, None)
+        if entry is not None:
+            reminder = entry[_REMINDER]
+            entry[_REMINDER] = None
+        else:
+            reminder = self._inflight.pop(reminder_id, None)
+            if reminder is None:
+                return self._cancel_digest_member(reminder_id)
+        self._forget_user_entry(reminder.user_id, reminder_id)
+        self._forget_digest_members(reminder)
+        return True
+
+    def _cancel_digest_member(self, reminder_id: str) -> bool:
+        digest_id = self._digest_of.pop(reminder_id, None)
+        if digest_id is None:
+            return False
+        digest = self._get(digest_id)
+        if digest is not None:
+            digest.discard(reminder_id)
+            if not digest.reminders:
+                self.cancel(digest_id)
+        return True
+
+    def cancel_user(self, user_id: int) -> int:
+        """Отменяет все живые напоминания пользователя за O(k)."""
+        reminder_ids = self._by_user.pop(user_id, set())
+        for reminder_id in reminder_ids:
+            entry = self._entries.pop(reminder_id, None)
+            if entry is not None:
+                reminder = entry[_REMINDER]
+                entry[_REMINDER] = None
+            else:
+                reminder = self._inflight.pop(reminder_id, None)
+            self._forget_digest_members(reminder)
+        return len(reminder_ids)
+
+    def complete(self, reminder_id: str) -> None:
+        """Вызывается после доставки (или окончательной ошибки) сработавшего напоминания."""
+        reminder = self._inflight.pop(reminder_id, None)
+        if reminder is not None:
+            self._forget_user_entry(reminder.user_id, reminder_id)
+            self._forget_digest_members(reminder)
+
+    def _forget_digest_members(self, reminder: ScheduledReminder | None) -> None:
+        if isinstance(reminder, DigestReminder):
+            for member in reminder.reminders:
+                self._digest_of.pop(member.id, None)
+
+    def _forget_user_entry(self, user_id: int, reminder_id: str) -> None:
+        user_ids = self._by_user.get(user_id)
+        if user_ids is None:
+            return
+        user_ids.discard(reminder_id)
+        if not user_ids:
+            del self._by_user[user_id]
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+            logger.info("Планировщик напоминаний запущен.")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Планировщик напоминаний остановлен.")
+
+    def _pop_due(self, now: datetime) -> list[ScheduledReminder]:
+        """Извлекает из кучи все напоминания, время которых наступило."""
+        due = []
+        while self._heap and self._heap[0][_TIME] <= now:
+            entry = heapq.heappop(self._heap)
+            reminder = entry[_REMINDER]
+            if reminder is None:
+                continue
+            del self._entries[reminder.id]
+            self._inflight[reminder.id] = reminder
+            due.append(reminder)
+        return due
+
+    def _next_delay(self, now: datetime) -> float | None:
+        """Секунды до ближайшего живого напоминания, либо None, если куча пуста."""
+        while self._heap and self._heap[0][_REMINDER] is None:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return None
+        return max((self._heap[0][_TIME] - now).total_seconds(), 0)
+
+    async def _run(self) -> None:
+        while True:
+            now = datetime.now()
+            # Колбэк только передаёт напоминание в очередь доставки, отдельная задача на каждое не нужна
+            for reminder in self._pop_due(now):
+                await self._fire(reminder)
+
+            delay = self._next_delay(datetime.now())
+            self._wakeup.clear()
+            try:
+                if delay is None:
+                    await self._wakeup.wait()
+                else:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, reminder: ScheduledReminder) -> None:
+        try:
+            await self._callback(reminder)
+        except Exception as e:
+            logger.error(f"Ошибка при срабатывании напоминания {reminder.id}: {e}")
+            self.complete(reminder.id)
+
+
+__all__ = ['ReminderScheduler']
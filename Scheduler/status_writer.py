@@ -0,0 +1,108 @@
+# Библиотеки
+import asyncio
+import logging
+import os
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from Database import connection
+from Database.repository import AdvanceRecurring, MarkExpired, MarkFailed, MarkSent, StatusUpdate
+
+load_dotenv('config.env')
+logger = logging.getLogger(__name__)
+
+# Пороги сброса буфера
+STATUS_FLUSH_SIZE = int(os.getenv("STATUS_FLUSH_SIZE", "100"))
+STATUS_FLUSH_INTERVAL_SECONDS = float(os.getenv("STATUS_FLUSH_INTERVAL_SECONDS", "1"))
+
+
+class StatusWriteBuffer:
+    """
+    Отложенная запись статусов доставки.
+    Обновления копятся в памяти и сбрасываются одним пакетом (bulk_write в MongoDB)
+    при достижении размера буфера или по таймеру.
+    """
+
+    def __init__(
+        self,
+        flush_size: int = STATUS_FLUSH_SIZE,
+        flush_interval: float = STATUS_FLUSH_INTERVAL_SECONDS,
+    ):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._pending: list[StatusUpdate] = []
+        self._flush_requested = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def mark_sent(self, reminder_id: str, sent_at: datetime) -> None:
+        self._add(MarkSent(reminder_id, sent_at))
+
+    def mark_failed(self, reminder_id: str, sent_at: datetime, error: str) -> None:
+        self._add(MarkFailed(reminder_id, sent_at, error))
+
+    def mark_expired(self, reminder_id: str, expired_at: datetime) -> None:
+        self._add(MarkExpired(reminder_id, expired_at))
+
+    def mark_advanced(self, reminder_id: str, occurrence: datetime, next_at: datetime, sent_at: datetime, lease: dict) -> None:
+        """Переводит повторяющееся напоминание на следующее срабатывание."""
+        self._add(AdvanceRecurring(reminder_id, occurrence, next_at, sent_at, lease))
+
+    def _add(self, operation: StatusUpdate) -> None:
+        self._pending.append(operation)
+        if len(self._pending) >= self.flush_size:
+            self._flush_requested.set()
+
+    async def flush(self) -> int:
+        """Записывает накопленные обновления в БД. Возвращает количество операций."""
+        async with self._lock:
+            if not self._pending:
+                return 0
+
+            if connection.reminders is None:
+                logger.critical("Хранилище напоминаний не инициализировано! Подключение к БД не выполнено?")
+                return 0
+
+            batch, self._pending = self._pending, []
+            try:
+                await connection.reminders.apply_status_updates(batch)
+                logger.debug("Записано %s обновлений статуса напоминаний.", len(batch))
+                return len(batch)
+            except Exception as e:
+                # Операции идемпотентны, поэтому возвращаем их в буфер для повторной попытки
+                logger.error(f"Ошибка при пакетной записи статусов напоминаний: {e}")
+                self._pending[:0] = batch
+                return 0
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновый сброс и записывает остаток буфера."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        flushed = await self.flush()
+        if flushed:
+            logger.info(f"При остановке записано {flushed} обновлений статуса напоминаний.")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_requested.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+
+__all__ = ['StatusWriteBuffer']
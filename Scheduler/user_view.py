@@ -0,0 +1,99 @@
+# Библиотеки
+import bisect
+import logging
+import os
+from datetime import datetime
+from typing import NamedTuple
+
+from cachetools import TTLCache
+from dotenv import load_dotenv
+
+from Database import connection
+
+load_dotenv('config.env')
+logger = logging.getLogger(__name__)
+
+# Сколько пользователей держать в памяти и как долго (ограничивает расхождение с БД,
+# если напоминания доставляет другой процесс)
+USER_VIEW_CACHE_SIZE = int(os.getenv("USER_VIEW_CACHE_SIZE", "10000"))
+USER_VIEW_TTL_SECONDS = float(os.getenv("USER_VIEW_TTL_SECONDS", "600"))
+# Сколько ближайших напоминаний пользователя читать из БД при холодном кэше
+USER_VIEW_MAX_ITEMS = int(os.getenv("USER_VIEW_MAX_ITEMS", "500"))
+
+
+class ListedReminder(NamedTuple):
+    target_datetime: datetime
+    id: str
+    reminder_text: str
+    recurrence: dict | None = None
+
+
+class UserReminderView:
+    """
+    Список неотправленных напоминаний пользователя для /list_reminders.
+    Держится в памяти отсортированным по времени и обновляется при создании,
+    отмене, отправке и переносе напоминаний, поэтому повторный просмотр не ходит в БД.
+    Если пользователя нет в кэше, список читается одним запросом по индексу
+    (user_id, target_datetime).
+    """
+
+    def __init__(
+        self,
+        cache_size: int = USER_VIEW_CACHE_SIZE,
+        ttl: float = USER_VIEW_TTL_SECONDS,
+        max_items: int = USER_VIEW_MAX_ITEMS,
+    ):
+        self.max_items = max_items
+        self._views: TTLCache = TTLCache(maxsize=cache_size, ttl=ttl)
+
+    def is_cached(self, user_id: int) -> bool:
+        return user_id in self._views
+
+    async def get(self, user_id: int, now: datetime | None = None) -> list[ListedReminder]:
+        """Будущие напоминания пользователя по возрастанию времени."""
+        now = now or datetime.now()
+        items = self._views.get(user_id)
+        if items is None:
+            items = await self._load(user_id, now)
+            self._views[user_id] = items
+        # Наступившие напоминания уже отправлены или отправляются - отбрасываем их с начала списка
+        start = bisect.bisect_right(items, now, key=lambda item: item.target_datetime)
+        if start:
+            del items[:start]
+        return items
+
+    async def _load(self, user_id: int, now: datetime) -> list[ListedReminder]:
+        docs = await connection.reminders.list_user_pending(user_id, now, self.max_items)
+        items = [
+            ListedReminder(doc["target_datetime"], doc["id"], doc["reminder_text"], doc.get("recurrence"))
+            for doc in docs
+        ]
+        logger.debug("Список напоминаний пользователя %s загружен из БД: %s шт.", user_id, len(items))
+        return items
+
+    def add(self, user_id: int, item: ListedReminder) -> None:
+        # Если пользователя нет в кэше, новое напоминание попадёт в список при загрузке из БД
+        items = self._views.get(user_id)
+        if items is None:
+            return
+        self._remove(items, item.id)
+        bisect.insort(items, item, key=lambda listed: listed.target_datetime)
+
+    def discard(self, user_id: int, reminder_id: str) -> None:
+        items = self._views.get(user_id)
+        if items is not None:
+            self._remove(items, reminder_id)
+
+    def clear(self, user_id: int) -> None:
+        """Все напоминания пользователя отменены: пустой список известен без запроса к БД."""
+        self._views[user_id] = []
+
+    @staticmethod
+    def _remove(items: list[ListedReminder], reminder_id: str) -> None:
+        for index, item in enumerate(items):
+            if item.id == reminder_id:
+                del items[index]
+                return
+
+
+__all__ = ['UserReminderView', 'ListedReminder']
@@ -0,0 +1,177 @@
+# Библиотеки
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Awaitable, Callable
+
+from dotenv import load_dotenv
+from pymongo.errors import OperationFailure, PyMongoError
+
+from Database import connection
+from Scheduler.entry import ScheduledReminder, SCHEDULED_PROJECTION
+from Scheduler.leases import LeaseManager
+
+load_dotenv('config.env')
+logger = logging.getLogger(__name__)
+
+# Настройки отслеживания изменений коллекции reminders
+WATCH_ENABLED = os.getenv("REMINDER_WATCH_ENABLED", "false").lower() in ("1", "true", "yes")
+WATCH_POLL_INTERVAL_SECONDS = float(os.getenv("REMINDER_WATCH_POLL_INTERVAL_SECONDS", "30"))
+WATCH_RETRY_SECONDS = 5
+
+# Коды ошибок MongoDB, когда change streams недоступны (standalone-сервер)
+CHANGE_STREAMS_UNSUPPORTED = (40573, 40324)
+
+# Обновления, которые влияют на планирование (продление аренд и т.п. пропускаем на сервере)
+WATCH_PIPELINE = [
+    {"$match": {"$or": [
+        {"operationType": {"$in": ["insert", "replace", "delete"]}},
+        {"operationType": "update", "$or": [
+            {"updateDescription.updatedFields.target_datetime": {"$exists": True}},
+            {"updateDescription.updatedFields.is_sent": {"$exists": True}},
+            {"updateDescription.updatedFields.reminder_text": {"$exists": True}},
+        ]},
+    ]}},
+]
+
+
+class ReminderWatcher:
+    """
+    Подхватывает напоминания, добавленные или изменённые в БД другими процессами и инструментами.
+    Основной режим - change stream с resume token (после переподключения пересканирование не нужно).
+    Если change streams недоступны, раз в WATCH_POLL_INTERVAL_SECONDS запрашиваются
+    напоминания с created_at новее последнего увиденного.
+    """
+
+    def __init__(
+        self,
+        schedule: Callable[[ScheduledReminder], Awaitable[None]],
+        cancel: Callable[[str], bool],
+        covers: Callable[[datetime], bool],
+        is_active: Callable[[str], bool],
+        leases: LeaseManager | None = None,
+        poll_interval: float = WATCH_POLL_INTERVAL_SECONDS,
+        collection_name: str = 'reminders',
+    ):
+        self._schedule = schedule
+        self._cancel = cancel
+        self._covers = covers
+        self._is_active = is_active
+        self.leases = leases
+        self.poll_interval = poll_interval
+        self.collection_name = collection_name
+        self.resume_token: dict | None = None
+        self.watermark: datetime | None = None # Для режима опроса
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        db = connection.db
+        if db is None:
+            logger.warning("Отслеживание изменений работает только с MongoDB, не запускаем.")
+            return
+        collection = db[self.collection_name]
+        await self._enable_pre_images(db)
+
+        while True:
+            try:
+                await self._watch(collection)
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.warning(f"Change streams недоступны ({e.code}), переходим на опрос по created_at.")
+                    await self._poll(collection)
+                    return
+                logger.error(f"Ошибка change stream: {e}. Переподключение через {WATCH_RETRY_SECONDS} с.")
+            except PyMongoError as e:
+                logger.error(f"Ошибка change stream: {e}. Переподключение через {WATCH_RETRY_SECONDS} с.")
+            await asyncio.sleep(WATCH_RETRY_SECONDS)
+
+    async def _enable_pre_images(self, db) -> None:
+        # Без pre-image событие delete содержит только _id, и нельзя узнать id напоминания
+        try:
+            await db.command({"collMod": self.collection_name, "changeStreamPreAndPostImages": {"enabled": True}})
+        except PyMongoError as e:
+            logger.debug(f"Pre-images для {self.collection_name} недоступны: {e}")
+
+    async def _watch(self, collection) -> None:
+        async with collection.watch(
+            WATCH_PIPELINE,
+            full_document='updateLookup',
+            full_document_before_change='whenAvailable',
+            resume_after=self.resume_token,
+        ) as stream:
+            logger.info(f"Отслеживание изменений коллекции {self.collection_name} запущено.")
+            async for change in stream:
+                try:
+                    await self._handle_change(change)
+                except Exception as e:
+                    logger.error(f"Ошибка при обработке изменения {change.get('operationType')}: {e}")
+                self.resume_token = stream.resume_token
+
+    async def _handle_change(self, change: dict) -> None:
+        operation = change["operationType"]
+        if operation == "delete":
+            before = change.get("fullDocumentBeforeChange")
+            if before and "id" in before:
+                self._cancel(before["id"])
+            return
+
+        doc = change.get("fullDocument")
+        if doc is None:
+            return # Документ уже удалён к моменту updateLookup
+        if doc.get("is_sent"):
+            self._cancel(doc["id"])
+            return
+        await self._offer(doc)
+
+    async def _offer(self, doc: dict) -> None:
+        """Планирует неотправленное напоминание, если оно попадает в загруженное окно."""
+        if not self._covers(doc["target_datetime"]):
+            if self._is_active(doc["id"]):
+                # Время перенесли за окно: старая запись сработала бы в прежний срок с прежним текстом
+                self._cancel(doc["id"])
+                if self.leases is not None:
+                    await self.leases.release(doc["id"])
+                logger.debug("Напоминание %s перенесено за пределы окна, локальная запись снята.", doc["id"])
+            return # Его подгрузит загрузчик, когда окно сдвинется
+        if self._is_active(doc["id"]):
+            # Уже запланировано этим процессом; возможно, изменилось время - перепланируем
+            await self._schedule(ScheduledReminder.from_doc(doc))
+            return
+        if self.leases is not None:
+            doc = await self.leases.claim(doc["id"])
+            if doc is None:
+                return # Напоминание уже у другого воркера
+        await self._schedule(ScheduledReminder.from_doc(doc))
+
+    async def _poll(self, collection) -> None:
+        # Всё, что создано до запуска, уже покрыто загрузчиком окна
+        self.watermark = self.watermark or datetime.now()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                query = {"is_sent": False, "created_at": {"$gt": self.watermark}}
+                projection = {**SCHEDULED_PROJECTION, "created_at": 1}
+                async for doc in collection.find(query, projection).sort("created_at", 1):
+                    self.watermark = max(self.watermark, doc["created_at"])
+                    if not self._is_active(doc["id"]):
+                        await self._offer(doc)
+            except PyMongoError as e:
+                logger.error(f"Ошибка при опросе новых напоминаний: {e}")
+
+
+__all__ = ['ReminderWatcher', 'WATCH_ENABLED']
@@ -0,0 +1,75 @@
+import os
+import sys
+import gzip
+import queue
+import shutil
+import logging
+import logging.handlers
+
+import dotenv
+
+dotenv.load_dotenv("config.env")
+
+LOG_FILE = os.getenv("LOG_FILE", "bot.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Ротация по времени (LOG_ROTATE_WHEN) или по размеру, если задан LOG_MAX_BYTES
+LOG_ROTATE_WHEN = os.getenv("LOG_ROTATE_WHEN", "midnight")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", "0"))
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", "7"))
+LOG_FORMAT = "%(asctime)s - [%(name)s] - %(levelname)s - %(message)s"
+
+_listener: logging.handlers.QueueListener | None = None
+
+def gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+def gzip_rotator(source: str, dest: str) -> None:
+    """Сжимает ротированный файл. Выполняется в потоке QueueListener, а не в event loop."""
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+def build_file_handler(file_path: str) -> logging.Handler:
+    if LOG_MAX_BYTES > 0:
+        handler = logging.handlers.RotatingFileHandler(
+            file_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    else:
+        handler = logging.handlers.TimedRotatingFileHandler(
+            file_path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    handler.namer = gzip_namer
+    handler.rotator = gzip_rotator
+    return handler
+
+def setup_logging(file_path: str = LOG_FILE) -> None:
+    """
+    Настраивает неблокирующее логирование.
+    Потоки приложения только кладут записи в очередь, а запись на диск,
+    ротацию и сжатие архивов выполняет отдельный поток QueueListener.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout), build_file_handler(file_path)]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+def stop_logging() -> None:
+    """Дописывает оставшиеся в очереди записи и останавливает поток логирования."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+__all__ = ['setup_logging', 'stop_logging']
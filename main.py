@@ -14,28 +14,30 @@ from aiohttp import ClientConnectorError
 # Импорты
 from Commands.start import router as start_router
 from Commands.help import router as help_router
-from Commands.reminders import router as reminders_router, set_bot_instance, load_pending_reminders
-from Database.connection import connect_to_mongo, close_mongo_connection
-from clean_logs import run_daily_cleanup
-
-# Создание логов
+from Commands.reminders import router as reminders_router, set_bot_instance, load_pending_reminders, start_scheduler, stop_scheduler, flush_status_updates
+from Database import connection
+from Database.connection import connect_database, ensure_indexes, close_mongo_connection
+from Database.retention import start_retention, stop_retention
+from Scheduler.leases import LEASES_ENABLED
+from log_setup import setup_logging, stop_logging
+from webhook import run_webhook
+from metrics import HandlerMetricsMiddleware, start_metrics_server, stop_metrics_server
+from throttling import ThrottlingMiddleware
+from startup import startup_state
+
+# Создание логов (запись, ротация и сжатие архивов идут в отдельном потоке)
 logger = logging.getLogger(__name__)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - [%(name)s] - %(levelname)s - %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler("bot.log", encoding="utf-8"),
-    ],
-)
+setup_logging()
 
 # Получение токена Бота
 dotenv.load_dotenv("config.env")
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower() # polling или webhook
 
 if not BOT_TOKEN:
     logger.error("Токен бота не обнаружен")
+    stop_logging()
     sys.exit(1)
 
 # Функция проверки стабильности подключения
@@ -51,86 +53,121 @@ async def check_internet_connection(bot: Bot) -> bool:
         logger.error(f'Произошла неожиданная ошибка при проверке подключения: {e}')
         return False
 
+MAX_RETRY = 5 # Максимальное количество попыток подключения к Telegram API
+RETRY_DELAY = 3 # Задержка между попытками подключения в секундах
+
+# Ожидание Telegram API (getMe) с повторными попытками
+async def wait_for_telegram(bot: Bot) -> None:
+    for attempt in range(1, MAX_RETRY + 1):
+        if await check_internet_connection(bot):
+            return
+        if attempt < MAX_RETRY:
+            logger.info(f'Повторная попытка через {RETRY_DELAY} секунд...')
+            await asyncio.sleep(RETRY_DELAY)
+    raise ConnectionError(f'Не удалось подключиться после {MAX_RETRY} попыток.')
+
+# Индексы и режим хранения отправленных напоминаний (TTL-индекс или фоновый архиватор)
+async def prepare_database() -> None:
+    try:
+        await ensure_indexes()
+    finally:
+        # Режим хранения не зависит от остальных индексов; без sent_by_time TTL просто не настроится
+        await start_retention()
+
+# Приём обновлений (polling или webhook) с переподключением при сетевых ошибках
+async def run_updates(dp: Dispatcher, bot: Bot) -> None:
+    attempt = 0
+    while True:
+        try:
+            startup_state.mark_accepting_updates()
+            logger.info('Бот успешно запущен и работает.')
+            if BOT_MODE == "webhook":
+                await run_webhook(dp, bot)
+            else:
+                await dp.start_polling(bot)
+            return
+
+        except (TelegramNetworkError, ClientConnectorError, asyncio.TimeoutError) as e:
+            # Обрабатываем сетевые ошибки и таймауты
+            logger.warning(f"Сетевая ошибка или таймаут при работе с Telegram API: {e}")
+            attempt += 1
+            if attempt >= MAX_RETRY:
+                logger.critical(f"Сетевые ошибки повторяются. Достигнуто максимальное количество попыток ({MAX_RETRY}). Завершение.")
+                return
+            logger.info(f"Переподключение через {RETRY_DELAY} секунд...")
+            await asyncio.sleep(RETRY_DELAY)
+
+async def _cancel_tasks(tasks: list[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
 # Функция main для инициализации бота
 async def main() -> None:
     bot: Bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
     dp = Dispatcher()
 
-    try:
-        await connect_to_mongo()
-    except Exception as e:
-        logger.critical(f"Не удалось подключиться к MongoDB: {e}")
-        sys.exit(1)
-
-    set_bot_instance(bot)
-
+    # Ограничение частоты сообщений - до фильтров и хендлеров, чтобы флуд не доходил до БД
+    throttling = ThrottlingMiddleware()
+    dp.message.outer_middleware(throttling)
+    dp.callback_query.outer_middleware(throttling)
+    # Время работы хендлеров всех роутеров из Commands/
+    dp.message.middleware(HandlerMetricsMiddleware())
     dp.include_router(start_router)
     dp.include_router(help_router)
     dp.include_router(reminders_router)
 
-    # Загрузка напоминаний из БД
-    await load_pending_reminders()
+    # Метрики и /ready доступны с самого начала запуска
+    await start_metrics_server()
 
-    # Фоновая задача по очистке логов
-    log_cleanup_task = asyncio.create_task(run_daily_cleanup('bot.log', 7))
+    # Независимые фазы идут параллельно: getMe не ждёт MongoDB, а приём обновлений - предзагрузки
+    telegram = asyncio.create_task(startup_state.run("telegram", wait_for_telegram(bot)))
+    background: list[asyncio.Task] = []
+    try:
+        try:
+            await startup_state.run("mongo", connect_database(ensure=False))
+        except Exception as e:
+            logger.critical(f"Не удалось подключиться к MongoDB: {e}")
+            sys.exit(1)
+        if LEASES_ENABLED and connection.db is None:
+            logger.critical("Аренды напоминаний (REMINDER_LEASES_ENABLED) работают только с MongoDB.")
+            sys.exit(1)
 
-    max_retry = 5 # Максимальное количество попыток переподключения
-    retry_delay = 3 # Задержка между попытками подключения в секундах
-    attempt = 0
+        set_bot_instance(bot)
+        start_scheduler()
+        background = [
+            asyncio.create_task(startup_state.run("indexes", prepare_database())),
+            # Напоминания, созданные во время предзагрузки, планируются сразу (см. PendingReminderLoader.covers)
+            asyncio.create_task(startup_state.run("preload", load_pending_reminders())),
+        ]
 
-    while attempt < max_retry:
         try:
-            logger.info("Попытка запустить бота...")
-
-            # Проверяем подключение перед запуском бота
-            if not await check_internet_connection(bot):
-                attempt += 1
-                if attempt == max_retry:
-                    logger.critical(f'Не удалось подключиться после {max_retry} попыток.')
-                    break
-                logger.info(f'Повторная попытка через {retry_delay} секунд...')
-                await asyncio.sleep(retry_delay)
-                continue
-
-            # Если подключение стабильно
-            logger.info("Подключение стабильно. Запуск бота...")
-            logger.info('Бот успешно запущен и работает.')
-            await asyncio.gather(
-                dp.start_polling(bot),
-                log_cleanup_task,
-            )
-            break
+            await telegram
+        except Exception as e:
+            logger.critical(f"Telegram API недоступен: {e}")
+            return
 
-        except (TelegramNetworkError, ClientConnectorError, asyncio.TimeoutError) as e:
-            # Обрабатываем сетевые ошибки и таймауты
-            logger.warning(f"Сетевая ошибка или таймаут при работе с Telegram API: {e}")
-            attempt += 1
-            if attempt >= max_retry:
-                logger.critical(f"Сетевые ошибки повторяются. Достигнуто максимальное количество попыток ({max_retry}). Завершение.")
-                break
-            logger.info(f"Переподключение через {retry_delay} секунд...")
-            await asyncio.sleep(retry_delay)
+        await run_updates(dp, bot)
 
-        except Exception as e:
-            logger.critical(f"Случилась критическая ошибка при запуске бота: {e}")
-            sys.exit(1)
-        finally:
-            # Завершаем задачу очистки логов
-            log_cleanup_task.cancel()
-            try:
-                await log_cleanup_task
-            except asyncio.CancelledError:
-                logger.info('Фоновая задача очистки логов остановлена.')
-            except Exception as e:
-                logger.error(f'Ошибка при остановке задачи очистки логов: {e}')
-
-            await close_mongo_connection()
-            await bot.session.close()
-            logger.info('Сессия бота закрыта.')
+    except Exception as e:
+        logger.critical(f"Случилась критическая ошибка при запуске бота: {e}")
+        sys.exit(1)
+    finally:
+        # Остановка выполняется один раз, после выхода из цикла переподключений
+        await _cancel_tasks([telegram, *background])
+        await stop_scheduler()
+        await flush_status_updates()
+        await stop_retention()
+        await close_mongo_connection()
+        await stop_metrics_server()
+        await bot.session.close()
+        logger.info('Сессия бота закрыта.')
 
 # Запуск бота
 if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        logger.info('Остановка бота...')
\ No newline at end of file
+        logger.info('Остановка бота...')
+    finally:
+        stop_logging()
\ No newline at end of file
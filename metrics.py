@@ -0,0 +1,229 @@
+# Библиотеки
+import asyncio
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+import dotenv
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from aiohttp import web
+from pymongo import monitoring
+
+from startup import add_health_routes
+
+dotenv.load_dotenv("config.env")
+logger = logging.getLogger(__name__)
+
+# Настройки HTTP-эндпоинта метрик (формат Prometheus)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9100"))
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Gauge:
+    """Значение вычисляется только в момент опроса, поэтому между опросами ничего не стоит."""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._function: Callable[[], float] = lambda: 0
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        self._function = function
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self._function()}",
+        ]
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # label_values -> [счётчики по корзинам..., сумма, количество]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in self._series.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(self.labels, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labels, label_values, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {series[-2]}")
+                lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+# Метрики бота
+SCHEDULED_REMINDERS = Gauge("myra_scheduled_reminders", "Напоминания, ожидающие в планировщике")
+DELIVERY_QUEUE_SIZE = Gauge("myra_delivery_queue_size", "Напоминания в очереди на отправку")
+SCHEDULER_LAG = Histogram("myra_scheduler_lag_seconds", "Насколько позже target_datetime срабатывает напоминание", buckets=LAG_BUCKETS)
+REMINDER_SENDS = Counter("myra_reminder_sends_total", "Результаты отправки напоминаний", ("result",))
+HANDLER_LATENCY = Histogram("myra_handler_latency_seconds", "Время обработки команд", ("handler",))
+MONGO_LATENCY = Histogram("myra_mongo_op_latency_seconds", "Время выполнения операций MongoDB", ("collection", "op"))
+EVENT_LOOP_LAG = Histogram("myra_event_loop_lag_seconds", "Задержка пробуждения event loop")
+THROTTLED_UPDATES = Counter("myra_throttled_updates_total", "Сообщения, отброшенные ограничением частоты", ("scope",))
+
+REGISTRY = [
+    SCHEDULED_REMINDERS, DELIVERY_QUEUE_SIZE, SCHEDULER_LAG, REMINDER_SENDS,
+    HANDLER_LATENCY, MONGO_LATENCY, EVENT_LOOP_LAG, THROTTLED_UPDATES,
+]
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Внутренний middleware: измеряет время работы сработавшего хендлера."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            handler_object = data.get("handler")
+            name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+            HANDLER_LATENCY.observe(time.perf_counter() - started, name)
+
+
+class MongoMetricsListener(monitoring.CommandListener):
+    """Слушатель команд pymongo: время каждой операции по коллекциям."""
+
+    def __init__(self):
+        self._started: dict[int, tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = "-"
+        with self._lock:
+            self._started[event.request_id] = (collection, event.command_name)
+
+    def _finished(self, event) -> None:
+        with self._lock:
+            labels = self._started.pop(event.request_id, None)
+        if labels is not None:
+            MONGO_LATENCY.observe(event.duration_micros / 1_000_000, *labels)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._finished(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._finished(event)
+
+
+mongo_listener = MongoMetricsListener()
+
+
+async def monitor_event_loop_lag(interval: float = 1.0) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.observe(max(loop.time() - expected, 0))
+
+
+_runner: web.AppRunner | None = None
+_lag_task: asyncio.Task | None = None
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=render_metrics(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server() -> None:
+    global _runner, _lag_task
+    if not METRICS_ENABLED or _runner is not None:
+        return
+
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    add_health_routes(app)
+    _runner = web.AppRunner(app)
+    await _runner.setup()
+    await web.TCPSite(_runner, host=METRICS_HOST, port=METRICS_PORT).start()
+    _lag_task = asyncio.create_task(monitor_event_loop_lag())
+    logger.info(f"Метрики доступны на http://{METRICS_HOST}:{METRICS_PORT}/metrics, готовность - на /ready")
+
+
+async def stop_metrics_server() -> None:
+    global _runner, _lag_task
+    if _lag_task is not None:
+        _lag_task.cancel()
+        _lag_task = None
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
+
+
+__all__ = [
+    'SCHEDULED_REMINDERS', 'DELIVERY_QUEUE_SIZE', 'SCHEDULER_LAG', 'REMINDER_SENDS', 'THROTTLED_UPDATES',
+    'HandlerMetricsMiddleware', 'mongo_listener', 'start_metrics_server', 'stop_metrics_server',
+]
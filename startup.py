@@ -0,0 +1,82 @@
+# Библиотеки
+import logging
+import time
+from typing import Awaitable, TypeVar
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Фазы, без которых бот не может принимать обновления
+REQUIRED_PHASES = ("mongo", "telegram")
+
+
+class StartupState:
+    """
+    Состояние запуска для логов и проверок здоровья.
+    Каждая фаза (подключение к MongoDB, getMe, индексы, предзагрузка) запускается через run()
+    и получает статус и длительность; готовность - когда завершены обязательные фазы.
+    """
+
+    def __init__(self, required: tuple[str, ...] = REQUIRED_PHASES):
+        self.required = required
+        self.started = time.perf_counter()
+        self.phases: dict[str, dict] = {}
+        self.accepting_updates = False
+
+    async def run(self, name: str, step: Awaitable[T]) -> T:
+        """Выполняет фазу запуска, замеряя время. Исключение фазы пробрасывается дальше."""
+        self.phases[name] = {"status": "running"}
+        started = time.perf_counter()
+        try:
+            result = await step
+        except BaseException as e:
+            self.phases[name] = {"status": "failed", "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+            logger.error(f"Фаза запуска {name} завершилась ошибкой за {time.perf_counter() - started:.2f} с: {e}")
+            raise
+        self.phases[name] = {"status": "done", "seconds": round(time.perf_counter() - started, 3)}
+        logger.info(f"Фаза запуска {name}: {time.perf_counter() - started:.2f} с.")
+        return result
+
+    @property
+    def ready(self) -> bool:
+        """Бот принимает обновления: обязательные фазы завершены."""
+        return self.accepting_updates and all(
+            self.phases.get(name, {}).get("status") == "done" for name in self.required
+        )
+
+    def mark_accepting_updates(self) -> None:
+        self.accepting_updates = True
+        logger.info(f"Бот принимает обновления через {time.perf_counter() - self.started:.2f} с после старта.")
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready,
+            "accepting_updates": self.accepting_updates,
+            "uptime_seconds": round(time.perf_counter() - self.started, 3),
+            "phases": self.phases,
+        }
+
+
+# Состояние запуска текущего процесса
+startup_state = StartupState()
+
+
+async def _handle_health(request: web.Request) -> web.Response:
+    # Процесс жив и отвечает - этого достаточно для liveness-проверки
+    return web.json_response({"status": "ok"})
+
+
+async def _handle_ready(request: web.Request) -> web.Response:
+    return web.json_response(startup_state.snapshot(), status=200 if startup_state.ready else 503)
+
+
+def add_health_routes(app: web.Application) -> None:
+    """Добавляет /health (жив ли процесс) и /ready (готов ли принимать обновления)."""
+    app.router.add_get("/health", _handle_health)
+    app.router.add_get("/ready", _handle_ready)
+
+
+__all__ = ['StartupState', 'startup_state', 'add_health_routes']
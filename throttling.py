@@ -0,0 +1,140 @@
+# Библиотеки
+import logging
+import os
+from typing import Any, Awaitable, Callable
+
+import dotenv
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from cachetools import TTLCache
+
+from Database import connection
+from Scheduler.delivery import TokenBucket
+from metrics import THROTTLED_UPDATES
+
+dotenv.load_dotenv('config.env')
+logger = logging.getLogger(__name__)
+
+# Частота сообщений от одного пользователя (в секунду) и допустимый всплеск
+THROTTLE_USER_RATE = float(os.getenv("THROTTLE_USER_RATE", "1"))
+THROTTLE_USER_BURST = float(os.getenv("THROTTLE_USER_BURST", "5"))
+# Общая частота сообщений, которую бот готов обрабатывать
+THROTTLE_GLOBAL_RATE = float(os.getenv("THROTTLE_GLOBAL_RATE", "50"))
+THROTTLE_GLOBAL_BURST = float(os.getenv("THROTTLE_GLOBAL_BURST", "100"))
+# Сколько пользователей держать в памяти; неактивные вытесняются по TTL
+THROTTLE_CACHE_SIZE = int(os.getenv("THROTTLE_CACHE_SIZE", "10000"))
+THROTTLE_CACHE_TTL_SECONDS = float(os.getenv("THROTTLE_CACHE_TTL_SECONDS", "60"))
+# Не чаще одного предупреждения пользователю за это время, остальное отбрасывается молча
+THROTTLE_WARN_SECONDS = float(os.getenv("THROTTLE_WARN_SECONDS", "10"))
+
+# Максимум неотправленных напоминаний у одного пользователя (0 - без ограничения)
+MAX_PENDING_PER_USER = int(os.getenv("MAX_PENDING_PER_USER", "100"))
+PENDING_CACHE_TTL_SECONDS = float(os.getenv("PENDING_CACHE_TTL_SECONDS", "600"))
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Внешний middleware: ограничивает частоту сообщений до фильтров и хендлеров,
+    так что флуд не доходит до MongoDB и планировщика.
+    Бакеты пользователей хранятся в TTLCache - неактивные пользователи не копятся в памяти
+    (через TTL бакет всё равно был бы полным).
+    """
+
+    def __init__(
+        self,
+        user_rate: float = THROTTLE_USER_RATE,
+        user_burst: float = THROTTLE_USER_BURST,
+        global_rate: float = THROTTLE_GLOBAL_RATE,
+        global_burst: float = THROTTLE_GLOBAL_BURST,
+        cache_size: int = THROTTLE_CACHE_SIZE,
+        cache_ttl: float = THROTTLE_CACHE_TTL_SECONDS,
+        warn_interval: float = THROTTLE_WARN_SECONDS,
+    ):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self._buckets: TTLCache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._warned: TTLCache = TTLCache(maxsize=cache_size, ttl=warn_interval)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+
+        bucket = self._buckets.get(user.id)
+        if bucket is None:
+            bucket = self._buckets[user.id] = TokenBucket(self.user_rate, self.user_burst)
+        if not bucket.try_acquire():
+            THROTTLED_UPDATES.inc("user")
+            await self._warn(event, user.id, "⏳ Слишком много сообщений. Подождите несколько секунд.")
+            return None
+        if not self.global_bucket.try_acquire():
+            THROTTLED_UPDATES.inc("global")
+            await self._warn(event, user.id, "⏳ Бот сейчас перегружен. Попробуйте чуть позже.")
+            return None
+        return await handler(event, data)
+
+    async def _warn(self, event: TelegramObject, user_id: int, text: str) -> None:
+        if user_id in self._warned:
+            return
+        self._warned[user_id] = True
+        logger.info("Сообщения пользователя %s отбрасываются ограничением частоты.", user_id)
+        answer = getattr(event, "answer", None)
+        if answer is None:
+            return
+        try:
+            await answer(text)
+        except Exception as e:
+            logger.debug(f"Не удалось предупредить пользователя {user_id} об ограничении: {e}")
+
+
+class PendingCounter:
+    """
+    Счётчик неотправленных напоминаний по пользователям для лимита MAX_PENDING_PER_USER.
+    При первом обращении значение берётся одним count по индексу user_pending,
+    дальше поддерживается в памяти при создании, отправке и отмене напоминаний.
+    TTL ограничивает расхождение с БД, если напоминания доставляет другой процесс.
+    """
+
+    def __init__(
+        self,
+        limit: int = MAX_PENDING_PER_USER,
+        cache_size: int = THROTTLE_CACHE_SIZE,
+        cache_ttl: float = PENDING_CACHE_TTL_SECONDS,
+    ):
+        self.limit = limit
+        self._counts: TTLCache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    async def get(self, user_id: int) -> int:
+        count = self._counts.get(user_id)
+        if count is None:
+            if connection.reminders is None:
+                return 0
+            count = await connection.reminders.count_user_pending(user_id)
+            self._counts[user_id] = count
+        return count
+
+    async def can_add(self, user_id: int, count: int = 1) -> bool:
+        if self.limit <= 0:
+            return True
+        return await self.get(user_id) + count <= self.limit
+
+    def add(self, user_id: int, count: int = 1) -> None:
+        # Если значения нет в кэше, оно будет прочитано из БД при следующей проверке
+        if user_id in self._counts:
+            self._counts[user_id] += count
+
+    def discard(self, user_id: int, count: int = 1) -> None:
+        if user_id in self._counts:
+            self._counts[user_id] = max(self._counts[user_id] - count, 0)
+
+    def reset(self, user_id: int) -> None:
+        self._counts[user_id] = 0
+
+
+__all__ = ['ThrottlingMiddleware', 'PendingCounter', 'MAX_PENDING_PER_USER']
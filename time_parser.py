@@ -0,0 +1,402 @@
+# Библиотеки
+import os
+import re
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import NamedTuple
+
+from dotenv import load_dotenv
+
+from Scheduler.recurrence import next_occurrence, validate_rule
+
+load_dotenv('config.env')
+
+# Во сколько напоминать, если указан только день ("завтра", "в пятницу", "15.03")
+DEFAULT_HOUR = int(os.getenv("REMINDER_DEFAULT_HOUR", "9"))
+# Сколько разобранных фраз о времени держать в кэше
+PARSE_CACHE_SIZE = int(os.getenv("TIME_PARSE_CACHE_SIZE", "4096"))
+
+# Один проход по строке: токены читаются по мере надобности и только до конца фразы о времени
+TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+   |(?P<date>\d{1,2}\.\d{1,2}(?:\.\d{2,4})?)
+   |(?P<clock>\d{1,2}:\d{2})
+   |(?P<num>\d+)
+   |(?P<word>[^\W\d_]+)
+   |(?P<other>\S)
+""", re.VERBOSE)
+
+DURATION_UNITS = {
+    **dict.fromkeys(("секунду", "секунды", "секунд", "сек"), timedelta(seconds=1)),
+    **dict.fromkeys(("минуту", "минуты", "минут", "мин"), timedelta(minutes=1)),
+    **dict.fromkeys(("час", "часа", "часов", "ч"), timedelta(hours=1)),
+    **dict.fromkeys(("день", "дня", "дней", "сутки", "суток"), timedelta(days=1)),
+    **dict.fromkeys(("неделю", "недели", "недель"), timedelta(weeks=1)),
+}
+# Единицы, которые пишутся без числа и уже содержат количество
+FIXED_DURATIONS = {"полчаса": timedelta(minutes=30), "полминуты": timedelta(seconds=30)}
+
+RELATIVE_DAYS = {"сегодня": 0, "завтра": 1, "послезавтра": 2}
+WEEKDAYS = {
+    **dict.fromkeys(("понедельник",), 0),
+    **dict.fromkeys(("вторник",), 1),
+    **dict.fromkeys(("среду", "среда"), 2),
+    **dict.fromkeys(("четверг",), 3),
+    **dict.fromkeys(("пятницу", "пятница"), 4),
+    **dict.fromkeys(("субботу", "суббота"), 5),
+    **dict.fromkeys(("воскресенье",), 6),
+}
+MONTHS = {
+    name: number for number, name in enumerate(
+        ("января", "февраля", "марта", "апреля", "мая", "июня",
+         "июля", "августа", "сентября", "октября", "ноября", "декабря"),
+        start=1,
+    )
+}
+PREPOSITIONS = ("в", "во")
+EVERY = ("каждый", "каждую", "каждое", "каждые")
+WEEKDAY_GROUPS = {"будням": [0, 1, 2, 3, 4], "выходным": [5, 6]}
+
+# Слова, из которых может состоять фраза о времени или правило повторения
+PHRASE_WORDS = {
+    *DURATION_UNITS, *FIXED_DURATIONS, *RELATIVE_DAYS, *WEEKDAYS, *MONTHS,
+    *PREPOSITIONS, *EVERY, *WEEKDAY_GROUPS, "через", "ежедневно", "по", "и",
+}
+# Начало строки из токенов словаря (с теми же границами, что у TOKEN_RE) - всё, что видит разбор.
+# Кэш держится по этому префиксу, а не по всему сообщению, поэтому текст напоминания
+# не мешает попаданиям и не хранится в памяти
+PHRASE_PATTERN = (
+    r"(?:\s*(?:\d{1,2}\.\d{1,2}(?:\.\d{2,4})?|\d{1,2}:\d{2}|\d+|,|(?:%s)(?![^\W\d_])))*"
+    % "|".join(sorted(map(re.escape, PHRASE_WORDS), key=len, reverse=True))
+)
+# Сопоставляется с text.lower(): без IGNORECASE альтернация слов заметно быстрее
+PHRASE_RE = re.compile(PHRASE_PATTERN)
+PHRASE_RE_ANY_CASE = re.compile(PHRASE_PATTERN, re.IGNORECASE)
+
+
+class TimeSpec(NamedTuple):
+    """Разобранная фраза о времени, не привязанная к текущему моменту."""
+    delta: timedelta | None = None # "через 2 часа 30 минут"
+    days: int | None = None # "сегодня" / "завтра" / "послезавтра"
+    weekday: int | None = None # "в пятницу"
+    date: tuple[int, int, int | None] | None = None # (день, месяц, год или None)
+    clock: tuple[int, int] | None = None # "в 18:30"
+
+    def resolve(self, now: datetime) -> datetime:
+        """Абсолютное время напоминания относительно now."""
+        if self.delta is not None and self.clock is None:
+            return now + self.delta
+
+        clock = time(*self.clock) if self.clock else time(DEFAULT_HOUR)
+        if self.delta is not None:
+            return datetime.combine((now + self.delta).date(), clock)
+        if self.days is not None:
+            return datetime.combine(now.date() + timedelta(days=self.days), clock)
+        if self.weekday is not None:
+            target = datetime.combine(now.date() + timedelta(days=(self.weekday - now.weekday()) % 7), clock)
+            return target if target > now else target + timedelta(weeks=1)
+        if self.date is not None:
+            return _resolve_date(self.date, clock, now)
+
+        # Только время: сегодня, а если оно уже прошло - завтра
+        target = datetime.combine(now.date(), clock)
+        return target if target > now else target + timedelta(days=1)
+
+
+def _resolve_date(spec: tuple[int, int, int | None], clock: time, now: datetime) -> datetime:
+    day, month, year = spec
+    if year is not None:
+        return datetime.combine(date(year, month, day), clock)
+    # Год не указан: ближайшая такая дата (для 29 февраля - ближайший високосный год)
+    for year in range(now.year, now.year + 8):
+        try:
+            target = datetime.combine(date(year, month, day), clock)
+        except ValueError:
+            continue
+        if target > now:
+            return target
+    raise ValueError(f"Некорректная дата {day:02d}.{month:02d}")
+
+
+class _Tokens:
+    """Ленивый поток токенов с просмотром вперёд; пробелы пропускаются."""
+
+    __slots__ = ('_matches', '_buffer', 'end')
+
+    def __init__(self, text: str):
+        self._matches = TOKEN_RE.finditer(text)
+        self._buffer: list[tuple[str, str, int]] = []
+        self.end = 0 # Позиция сразу после последнего принятого токена
+
+    def peek(self, offset: int = 0) -> tuple[str | None, str]:
+        while len(self._buffer) <= offset:
+            match = next(self._matches, None)
+            if match is None:
+                return None, ""
+            if match.lastgroup != "ws":
+                value = match.group()
+                self._buffer.append((match.lastgroup, value.lower() if match.lastgroup == "word" else value, match.end()))
+        kind, value, _ = self._buffer[offset]
+        return kind, value
+
+    def take(self, count: int = 1) -> None:
+        self.end = self._buffer[count - 1][2]
+        del self._buffer[:count]
+
+
+def _parse_clock(value: str) -> tuple[int, int] | None:
+    hour, minute = map(int, value.split(":"))
+    return (hour, minute) if hour < 24 and minute < 60 else None
+
+
+def _parse_numeric_date(value: str) -> tuple[int, int, int | None] | None:
+    parts = [int(part) for part in value.split(".")]
+    year = parts[2] if len(parts) == 3 else None
+    if year is not None and year < 100:
+        year += 2000
+    return _valid_date(parts[0], parts[1], year)
+
+
+def _valid_date(day: int, month: int, year: int | None) -> tuple[int, int, int | None] | None:
+    try:
+        date(year or 2000, month, day) # 2000 - високосный, 29 февраля допустимо
+    except ValueError:
+        return None
+    return day, month, year
+
+
+def _parse_duration(tokens: _Tokens) -> timedelta | None:
+    """Разбирает "[N] единица ([и] [N] единица)*" сразу после "через"."""
+    total = timedelta()
+    parsed = False
+    while True:
+        skip = 1 if parsed and tokens.peek() == ("word", "и") else 0
+        kind, value = tokens.peek(skip)
+        if kind == "word" and value in FIXED_DURATIONS:
+            total += FIXED_DURATIONS[value]
+            tokens.take(skip + 1)
+        elif kind == "word" and value in DURATION_UNITS:
+            total += DURATION_UNITS[value] # "через час", "через неделю"
+            tokens.take(skip + 1)
+        elif kind == "num" and tokens.peek(skip + 1)[1] in DURATION_UNITS:
+            total += int(value) * DURATION_UNITS[tokens.peek(skip + 1)[1]]
+            tokens.take(skip + 2)
+        else:
+            return total if parsed else None
+        parsed = True
+
+
+def _scan(text: str) -> tuple[TimeSpec | None, int]:
+    """Разбирает фразу о времени в начале text. Возвращает её разбор и позицию, где она закончилась."""
+    tokens = _Tokens(text)
+    parts: dict = {}
+
+    while True:
+        kind, value = tokens.peek()
+        prep = kind == "word" and value in PREPOSITIONS
+        next_kind, next_value = tokens.peek(1) if prep else (kind, value)
+        step = 2 if prep else 1
+
+        if kind == "word" and value == "через" and "delta" not in parts and not parts.keys() & {"days", "weekday", "date"}:
+            saved = tokens.end
+            tokens.take()
+            delta = _parse_duration(tokens)
+            if delta is None:
+                tokens.end = saved # "через" без единицы времени - это уже текст напоминания
+                break
+            parts["delta"] = delta
+        elif not prep and kind == "word" and value in RELATIVE_DAYS and not parts.keys() & {"delta", "days", "weekday", "date"}:
+            parts["days"] = RELATIVE_DAYS[value]
+            tokens.take()
+        elif next_kind == "word" and next_value in WEEKDAYS and not parts.keys() & {"delta", "days", "weekday", "date"}:
+            parts["weekday"] = WEEKDAYS[next_value]
+            tokens.take(step)
+        elif next_kind == "clock" and "clock" not in parts:
+            clock = _parse_clock(next_value)
+            if clock is None:
+                break
+            parts["clock"] = clock
+            tokens.take(step)
+        elif not prep and kind == "date" and not parts.keys() & {"delta", "days", "weekday", "date"}:
+            spec = _parse_numeric_date(value)
+            if spec is None:
+                break
+            parts["date"] = spec
+            tokens.take()
+        elif not prep and kind == "num" and tokens.peek(1)[1] in MONTHS and not parts.keys() & {"delta", "days", "weekday", "date"}:
+            month = MONTHS[tokens.peek(1)[1]]
+            year_kind, year_value = tokens.peek(2)
+            year = int(year_value) if year_kind == "num" and len(year_value) == 4 else None
+            spec = _valid_date(int(value), month, year)
+            if spec is None:
+                break
+            parts["date"] = spec
+            tokens.take(3 if year is not None else 2)
+        else:
+            break
+
+    if not parts:
+        return None, 0
+    return TimeSpec(**parts), tokens.end
+
+
+def time_phrase(text: str) -> str:
+    """
+    Префикс text, который может относиться к фразе о времени, в нижнем регистре;
+    разбор дальше него не заглядывает. Позиции в префиксе совпадают с позициями в text.
+    """
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return PHRASE_RE.match(lowered).group()
+    # Редкие символы удлиняются при lower(), и позиции бы разъехались
+    return text[:PHRASE_RE_ANY_CASE.match(text).end()]
+
+
+# Разбор зависит только от фразы о времени, поэтому повторяющиеся фразы берутся из кэша
+_scan_phrase = lru_cache(maxsize=PARSE_CACHE_SIZE)(_scan)
+
+
+def scan(text: str) -> tuple[TimeSpec | None, int]:
+    """_scan с кэшем по фразе о времени; позиция конца фразы та же, что в text."""
+    return _scan_phrase(time_phrase(text))
+
+
+def _parse_optional_clock(tokens: _Tokens) -> tuple[int, int] | None:
+    """Необязательное "[в] HH:MM"; токены не трогаются, если времени нет."""
+    kind, value = tokens.peek()
+    step = 1
+    if kind == "word" and value in PREPOSITIONS:
+        kind, value = tokens.peek(1)
+        step = 2
+    if kind != "clock":
+        return None
+    clock = _parse_clock(value)
+    if clock is not None:
+        tokens.take(step)
+    return clock
+
+
+def _parse_weekday_list(tokens: _Tokens) -> list[int]:
+    """Разбирает "понедельник [и|, четверг ...]" после "каждый"."""
+    weekdays = []
+    while True:
+        skip = 1 if weekdays and tokens.peek()[1] in ("и", ",") else 0
+        kind, value = tokens.peek(skip)
+        if kind != "word" or value not in WEEKDAYS:
+            return weekdays
+        weekdays.append(WEEKDAYS[value])
+        tokens.take(skip + 1)
+
+
+def _scan_recurring(text: str) -> tuple[dict | None, int]:
+    """Разбирает правило повторения в начале text. Возвращает правило и позицию, где фраза закончилась."""
+    tokens = _Tokens(text)
+    kind, value = tokens.peek()
+
+    if kind == "word" and value == "ежедневно":
+        tokens.take()
+        clock = _parse_optional_clock(tokens) or (DEFAULT_HOUR, 0)
+        return {"at": f"{clock[0]}:{clock[1]:02d}"}, tokens.end
+
+    if kind == "word" and value == "по" and tokens.peek(1)[1] in WEEKDAY_GROUPS:
+        weekdays = WEEKDAY_GROUPS[tokens.peek(1)[1]]
+        tokens.take(2)
+        clock = _parse_optional_clock(tokens) or (DEFAULT_HOUR, 0)
+        return {"at": f"{clock[0]}:{clock[1]:02d}", "weekdays": weekdays}, tokens.end
+
+    if kind != "word" or value not in EVERY:
+        return None, 0
+    tokens.take()
+
+    weekdays = _parse_weekday_list(tokens)
+    if weekdays:
+        clock = _parse_optional_clock(tokens) or (DEFAULT_HOUR, 0)
+        return {"at": f"{clock[0]}:{clock[1]:02d}", "weekdays": weekdays}, tokens.end
+
+    kind, value = tokens.peek()
+    count = 1
+    if kind == "num":
+        count = int(value)
+        kind, value = tokens.peek(1)
+        if kind != "word" or value not in DURATION_UNITS:
+            return None, 0
+        tokens.take(2)
+    elif kind == "word" and value in FIXED_DURATIONS:
+        tokens.take()
+        return {"every": int(FIXED_DURATIONS[value].total_seconds())}, tokens.end
+    elif kind == "word" and value in DURATION_UNITS:
+        tokens.take()
+    else:
+        return None, 0
+
+    step = count * DURATION_UNITS[value]
+    if step == timedelta(days=1):
+        # "каждый день в 9:00" - в фиксированное время, а не через сутки от создания
+        clock = _parse_optional_clock(tokens)
+        if clock is not None:
+            return {"at": f"{clock[0]}:{clock[1]:02d}"}, tokens.end
+    return {"every": int(step.total_seconds())}, tokens.end
+
+
+_scan_recurring_phrase = lru_cache(maxsize=PARSE_CACHE_SIZE)(_scan_recurring)
+
+
+def scan_recurring(text: str) -> tuple[dict | None, int]:
+    """_scan_recurring с кэшем по фразе о правиле повторения."""
+    return _scan_recurring_phrase(time_phrase(text))
+
+
+def parse_recurring(text: str, now: datetime | None = None) -> tuple[dict, datetime, str] | None:
+    """
+    Разбирает "<правило повторения> <текст>".
+    Возвращает проверенное правило, первое срабатывание и текст напоминания,
+    или None, если в начале строки нет правила повторения.
+    Поддерживает:
+    - "каждые N минут/часов/дней/недель", "каждый час", "каждые полчаса"
+    - "каждый день в HH:MM", "ежедневно [в HH:MM]"
+    - "каждый понедельник [и четверг] [в HH:MM]", "по будням/выходным [в HH:MM]"
+    """
+    now = now or datetime.now()
+    try:
+        # Огромные количества ("каждые 99999999999 недель") не помещаются в timedelta
+        rule, end = scan_recurring(text)
+        if rule is None:
+            return None
+        rule = validate_rule(rule)
+        first = next_occurrence(rule, now, now)
+    except (ValueError, OverflowError):
+        return None
+    return rule, first, text[end:].strip()
+
+
+def parse_reminder(text: str, now: datetime | None = None) -> tuple[datetime, str] | None:
+    """
+    Разбирает "<время> <текст>" за один проход.
+    Возвращает абсолютное время (вычисленное один раз относительно now) и текст напоминания,
+    или None, если в начале строки нет фразы о времени.
+    Поддерживает:
+    - "через N минут/часов/дней/недель", в том числе составные ("через 1 час 30 минут", "через полчаса")
+    - "в HH:MM", "сегодня/завтра/послезавтра [в HH:MM]"
+    - "в понедельник ... в воскресенье [в HH:MM]"
+    - "15.03", "15.03.2027", "15 марта [2027] [в HH:MM]"
+    """
+    try:
+        # Огромные количества ("через 99999999999 недель") не помещаются в timedelta
+        spec, end = scan(text)
+        if spec is None:
+            return None
+        target = spec.resolve(now or datetime.now())
+    except (ValueError, OverflowError):
+        return None
+    return target, text[end:].strip()
+
+
+def parse_time(phrase: str, now: datetime | None = None) -> datetime | None:
+    """Абсолютное время для фразы целиком или None, если фраза не распознана полностью."""
+    parsed = parse_reminder(phrase, now)
+    if parsed is None or parsed[1]:
+        return None
+    return parsed[0]
+
+
+__all__ = ['TimeSpec', 'parse_reminder', 'parse_recurring', 'parse_time', 'scan', 'scan_recurring']
@@ -0,0 +1,93 @@
+# Библиотеки
+import asyncio
+import logging
+import os
+from typing import Any
+
+import dotenv
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from startup import add_health_routes
+
+dotenv.load_dotenv("config.env")
+logger = logging.getLogger(__name__)
+
+# Настройки webhook-режима
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "") # Публичный адрес, например https://example.com
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET") or None
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv("WEBHOOK_MAX_CONCURRENCY", "64"))
+
+
+class BoundedRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик webhook, который обрабатывает обновления параллельно, но не более
+    max_concurrency одновременно. Когда лимит исчерпан, ответ Telegram задерживается,
+    и он сам снижает темп доставки обновлений.
+    """
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_concurrency: int, **kwargs: Any):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, **kwargs)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        await self._semaphore.acquire()
+
+        feed_update_task = asyncio.create_task(self._background_feed_update(bot=bot, update=update))
+        self._background_feed_update_tasks.add(feed_update_task)
+        feed_update_task.add_done_callback(self._on_update_done)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    def _on_update_done(self, task: asyncio.Task) -> None:
+        self._background_feed_update_tasks.discard(task)
+        self._semaphore.release()
+        if not task.cancelled() and task.exception():
+            logger.error(f"Ошибка при обработке обновления из webhook: {task.exception()}")
+
+    async def close(self) -> None:
+        # Сессию бота закрывает main() после остановки сервера
+        pass
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """Запускает aiohttp-сервер для приёма обновлений и работает до отмены."""
+    app = web.Application()
+    BoundedRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        max_concurrency=WEBHOOK_MAX_CONCURRENCY,
+        secret_token=WEBHOOK_SECRET,
+    ).register(app, path=WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    add_health_routes(app)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host=WEBHOOK_HOST, port=WEBHOOK_PORT)
+    await site.start()
+    logger.info(f"Webhook-сервер слушает {WEBHOOK_HOST}:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+
+    try:
+        if WEBHOOK_URL:
+            await bot.set_webhook(
+                url=f"{WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}",
+                secret_token=WEBHOOK_SECRET,
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+            logger.info("Webhook зарегистрирован в Telegram.")
+        else:
+            # Без публичного адреса сервер принимает только локальные (тестовые) запросы
+            logger.warning("WEBHOOK_URL не задан: webhook в Telegram не зарегистрирован.")
+
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+        logger.info("Webhook-сервер остановлен.")
+
+
+__all__ = ['run_webhook', 'BoundedRequestHandler']
@@ -0,0 +1,74 @@
+# Библиотеки
+import asyncio
+import logging
+import sys
+import os
+import dotenv
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+
+# Импорты
+from Commands.reminders import set_bot_instance, load_pending_reminders, start_scheduler, stop_scheduler, flush_status_updates
+from Database.connection import connect_to_mongo, close_mongo_connection
+from Scheduler.leases import LEASES_ENABLED, WORKER_ID
+from log_setup import setup_logging, stop_logging
+
+# Воркер доставки напоминаний без приёма обновлений.
+# Несколько таких процессов (и main.py) делят напоминания через аренду в MongoDB.
+
+logger = logging.getLogger(__name__)
+
+dotenv.load_dotenv("config.env")
+BOT_TOKEN = os.getenv("BOT_TOKEN")
+# У каждого процесса свой файл: ротацию одного файла из нескольких процессов не согласовать
+WORKER_LOG_FILE = os.getenv("WORKER_LOG_FILE") or f"worker-{WORKER_ID}.log"
+
+# Запись, ротация и сжатие архивов идут в отдельном потоке, как в main.py
+setup_logging(WORKER_LOG_FILE)
+
+if not BOT_TOKEN:
+    logger.error("Токен бота не обнаружен")
+    stop_logging()
+    sys.exit(1)
+
+if not LEASES_ENABLED:
+    logger.error("Для запуска нескольких воркеров включите REMINDER_LEASES_ENABLED=true")
+    stop_logging()
+    sys.exit(1)
+
+async def main() -> None:
+    bot: Bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+    try:
+        await connect_to_mongo()
+    except Exception as e:
+        logger.critical(f"Не удалось подключиться к MongoDB: {e}")
+        sys.exit(1)
+
+    set_bot_instance(bot)
+    logger.info(f"Воркер доставки {WORKER_ID} запущен.")
+
+    try:
+        start_scheduler()
+        try:
+            await load_pending_reminders()
+        except Exception:
+            pass # Уже записано в лог; окно загрузит фоновая дозагрузка
+        # Дальше работают фоновые задачи планировщика, дозагрузки и продления аренд
+        await asyncio.Event().wait()
+    finally:
+        await stop_scheduler()
+        await flush_status_updates()
+        await close_mongo_connection()
+        await bot.session.close()
+        logger.info(f"Воркер доставки {WORKER_ID} остановлен.")
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info('Остановка воркера...')
+    finally:
+        stop_logging()